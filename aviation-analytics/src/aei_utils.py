@@ -0,0 +1,262 @@
+import time
+import zipfile
+import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BTS_BASE_URL = "https://transtats.bts.gov/PREZIP/"
+BTS_CACHE_DIR = Path("aviation-analytics/data/raw/bts")
+
+def bts_month_filename(year, month):
+    return f"On_Time_Reporting_Carrier_On_Time_Performance_1987_present_{year}_{month}.zip"
+
+def fetch_bts_month(year, month, cache_dir=BTS_CACHE_DIR, base_url=BTS_BASE_URL,
+                    retries=3, timeout=60, chunk_size=1 << 20):
+    """
+    Downloads one month of BTS On-Time Performance data into the local zip cache.
+    Cached zips are returned without touching the network. Downloads are streamed to a
+    .part file and resumed with an HTTP Range request after a failure.
+    Returns the path of the cached zip, or None if every attempt failed.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    zip_path = cache_dir / bts_month_filename(year, month)
+    if zip_path.exists():
+        return zip_path
+
+    url = base_url.rstrip('/') + '/' + zip_path.name
+    part_path = zip_path.with_name(zip_path.name + ".part")
+
+    for attempt in range(1, retries + 1):
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        try:
+            # verify=False: BTS legacy certs fail validation on some environments
+            with requests.get(url, headers=headers, stream=True, timeout=timeout, verify=False) as r:
+                # 416 means the partial file already holds the whole body
+                if r.status_code != 416:
+                    r.raise_for_status()
+                    # Server ignored the Range header, so start over
+                    mode = 'ab' if offset and r.status_code == 206 else 'wb'
+                    with open(part_path, mode) as f:
+                        for chunk in r.iter_content(chunk_size):
+                            f.write(chunk)
+
+            if not zipfile.is_zipfile(part_path):
+                part_path.unlink()
+                raise zipfile.BadZipFile(f"{url} did not return a valid zip")
+
+            part_path.replace(zip_path)
+            return zip_path
+        except (requests.RequestException, OSError, zipfile.BadZipFile) as e:
+            print(f"Attempt {attempt}/{retries} failed for {year}-{month}: {e}")
+            if attempt < retries:
+                time.sleep(2 ** attempt)
+
+    return None
+
+def fetch_bts_months(year_months, max_workers=4, **kwargs):
+    """
+    Fetches several months concurrently with a bounded thread pool.
+    Returns {(year, month): zip path or None}.
+    """
+    year_months = list(year_months)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = pool.map(lambda ym: fetch_bts_month(ym[0], ym[1], **kwargs), year_months)
+        return dict(zip(year_months, paths))
+
+# Canonical (upper-case) BTS columns and the narrow dtypes they are parsed with
+BTS_DTYPES = {
+    'YEAR': 'int16',
+    'MONTH': 'int8',
+    'DAYOFMONTH': 'int8',
+    'REPORTING_AIRLINE': 'category',
+    'ORIGIN': 'category',
+    'DEST': 'category',
+    'DEP_DELAY': 'float32',
+    'ARR_DELAY': 'float32',
+    'CANCELLED': 'float32',
+    'DIVERTED': 'float32',
+}
+
+# BTS uses DepDelay/ArrDelay in the PREZIP files
+BTS_RENAMES = {'DEPDELAY': 'DEP_DELAY', 'ARRDELAY': 'ARR_DELAY'}
+
+AEI_GROUP_KEYS = ['ORIGIN', 'REPORTING_AIRLINE', 'DAYOFMONTH']
+
+AEI_SUM_COLUMNS = [
+    'flights', 'dep_delay_sum', 'dep_delay_sq_sum', 'arr_delay_sum', 'arr_delay_sq_sum', 'cancelled', 'diverted'
+]
+
+def _canonical_name(column):
+    upper = column.upper()
+    return BTS_RENAMES.get(upper, upper)
+
+def iter_bts_chunks(zip_path, chunksize=500_000):
+    """
+    Streams the CSV inside a BTS month zip in chunks, decompressing on the fly.
+    Only the columns in BTS_DTYPES are parsed, with canonical names and narrow dtypes.
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        csv_name = [n for n in zf.namelist() if n.lower().endswith(".csv")][0]
+        with zf.open(csv_name) as f:
+            header = pd.read_csv(f, nrows=0).columns
+        names = {c: _canonical_name(c) for c in header if _canonical_name(c) in BTS_DTYPES}
+        dtypes = {c: BTS_DTYPES[name] for c, name in names.items()}
+
+        with zf.open(csv_name) as f:
+            for chunk in pd.read_csv(f, usecols=list(names), dtype=dtypes, chunksize=chunksize):
+                yield chunk.rename(columns=names)
+
+def _aggregate_chunk(chunk, keys):
+    # Missing delays (cancelled flights) count as zero, matching the original AEI averages
+    dep_delay = chunk['DEP_DELAY'].fillna(0).astype('float64')
+    arr_delay = chunk['ARR_DELAY'].fillna(0).astype('float64')
+    chunk = chunk.assign(
+        flights=1,
+        dep_delay_sum=dep_delay,
+        dep_delay_sq_sum=dep_delay ** 2,
+        arr_delay_sum=arr_delay,
+        arr_delay_sq_sum=arr_delay ** 2,
+        cancelled=chunk['CANCELLED'].fillna(0),
+        diverted=chunk['DIVERTED'].fillna(0),
+    )
+    # Sums are widened to float64 so month-long totals do not lose float32 precision
+    return chunk.groupby(keys, observed=True)[AEI_SUM_COLUMNS].sum().astype('float64')
+
+def _fold(partials, keys):
+    combined = pd.concat(partials)
+    return combined.groupby(level=list(range(len(keys))), observed=True)[AEI_SUM_COLUMNS].sum()
+
+def aggregate_bts_month(zip_path, keys=AEI_GROUP_KEYS, chunksize=500_000, fold_every=8):
+    """
+    Folds a BTS month into running sums per group without materializing the month.
+    Peak memory is one chunk plus at most fold_every partial aggregates, each bounded
+    by the number of groups rather than the number of flights.
+    Returns a DataFrame with one row per group and the columns in AEI_SUM_COLUMNS.
+    """
+    partials = []
+    for chunk in iter_bts_chunks(zip_path, chunksize=chunksize):
+        partials.append(_aggregate_chunk(chunk, keys))
+        if len(partials) >= fold_every:
+            partials = [_fold(partials, keys)]
+
+    if not partials:
+        return pd.DataFrame(columns=keys + AEI_SUM_COLUMNS)
+    result = _fold(partials, keys).reset_index()
+    result.columns = keys + AEI_SUM_COLUMNS
+    result['flights'] = result['flights'].astype('int64')
+    # Category codes differ between months, so keys are returned as plain strings
+    for key in keys:
+        if isinstance(result[key].dtype, pd.CategoricalDtype):
+            result[key] = result[key].astype(str)
+    return result
+
+AEI_CUBE_PATH = Path("aviation-analytics/data/processed/aei_cube.parquet")
+
+# Per-airport AEI written by process_all.py before the cube existed
+AEI_CSV_PATH = Path("aviation-analytics/data/processed/airport_efficiency.csv.gz")
+
+# Airports with fewer flights over the period (or, for monthly rows, in the month) are
+# left out of AEI results; their average delays are extreme and noisy
+AEI_MIN_FLIGHTS = 1000
+AEI_MIN_MONTHLY_FLIGHTS = 100
+
+# Finest grain kept on disk; every rollup is a sum over these keys
+AEI_CUBE_KEYS = ['ORIGIN', 'DEST', 'REPORTING_AIRLINE', 'YEAR', 'MONTH']
+
+def build_month_cube(zip_path, chunksize=500_000):
+    """
+    Streams one BTS month zip into cube rows keyed by AEI_CUBE_KEYS.
+    """
+    return aggregate_bts_month(zip_path, keys=AEI_CUBE_KEYS, chunksize=chunksize)
+
+def load_cube(path=AEI_CUBE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=AEI_CUBE_KEYS + AEI_SUM_COLUMNS)
+    return pd.read_parquet(path)
+
+def save_cube(cube, path=AEI_CUBE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cube = cube.astype({'YEAR': 'int16', 'MONTH': 'int8'})
+    for key in ['ORIGIN', 'DEST', 'REPORTING_AIRLINE']:
+        cube[key] = cube[key].astype('category')
+    tmp_path = path.with_name(path.name + ".tmp")
+    cube.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+
+def cube_months(cube):
+    """
+    Returns the set of (year, month) pairs already present in the cube.
+    """
+    pairs = cube[['YEAR', 'MONTH']].drop_duplicates().itertuples(index=False)
+    return {(int(year), int(month)) for year, month in pairs}
+
+def merge_cube(cube, new_rows):
+    """
+    Merges new cube rows in O(groups). Months present in new_rows replace any existing
+    rows for the same months, so re-merging a month never double counts.
+    """
+    if cube.empty:
+        return new_rows.reset_index(drop=True)
+    replaced = pd.MultiIndex.from_frame(new_rows[['YEAR', 'MONTH']].drop_duplicates().astype('int64'))
+    existing = pd.MultiIndex.from_frame(cube[['YEAR', 'MONTH']].astype('int64'))
+    kept = cube[~existing.isin(replaced)]
+    # Categories differ between the stored cube and fresh rows, so concat on plain strings
+    kept = kept.astype({key: str for key in ['ORIGIN', 'DEST', 'REPORTING_AIRLINE']})
+    return pd.concat([kept, new_rows], ignore_index=True)
+
+def rollup_cube(cube, by, years=None, months=None, carriers=None, origins=None):
+    """
+    Sums cube rows over every key not in `by`, optionally restricted to a slice,
+    and derives the AEI metrics from the additive totals.
+    Args:
+        by (list): Cube keys to keep, e.g. ['ORIGIN'] or ['ORIGIN', 'YEAR', 'MONTH'].
+    """
+    mask = pd.Series(True, index=cube.index)
+    if years is not None:
+        mask &= cube['YEAR'].isin(years)
+    if months is not None:
+        mask &= cube['MONTH'].isin(months)
+    if carriers is not None:
+        mask &= cube['REPORTING_AIRLINE'].isin(carriers)
+    if origins is not None:
+        mask &= cube['ORIGIN'].isin(origins)
+
+    totals = cube[mask].groupby(by, observed=True)[AEI_SUM_COLUMNS].sum().reset_index()
+    n = totals['flights']
+
+    rollup = totals[by].copy()
+    rollup['total_flights'] = n
+    rollup['total_dep_delay'] = totals['dep_delay_sum']
+    rollup['total_cancelled'] = totals['cancelled']
+    rollup['total_diverted'] = totals['diverted']
+    rollup['avg_dep_delay'] = totals['dep_delay_sum'] / n
+    rollup['dep_delay_std'] = (totals['dep_delay_sq_sum'] / n - rollup['avg_dep_delay'] ** 2).clip(lower=0) ** 0.5
+    rollup['avg_arr_delay'] = totals['arr_delay_sum'] / n
+    rollup['cancellation_rate'] = totals['cancelled'] / n
+    rollup['diversion_rate'] = totals['diverted'] / n
+    return rollup
+
+def load_aei_frame(cube_path=AEI_CUBE_PATH, csv_path=AEI_CSV_PATH):
+    """
+    AEI training rows: airport-month rollups of the cube, or the per-airport CSV for older pipelines.
+    """
+    cube = load_cube(cube_path)
+    if not cube.empty:
+        print(f"Loading AEI Data from {cube_path}...")
+        # Same significance rule as the per-airport CSV, then a floor on each monthly row
+        airports = rollup_cube(cube, ['ORIGIN'])
+        significant = airports.loc[airports['total_flights'] > AEI_MIN_FLIGHTS, 'ORIGIN']
+        # One row per airport and month, so the model sees monthly volume and seasonality
+        monthly = rollup_cube(cube, ['ORIGIN', 'YEAR', 'MONTH'], origins=significant)
+        monthly = monthly[monthly['total_flights'] >= AEI_MIN_MONTHLY_FLIGHTS]
+        return monthly.rename(columns={'MONTH': 'month'}).reset_index(drop=True)
+    if Path(csv_path).exists():
+        print(f"Loading AEI Data from {csv_path}...")
+        return pd.read_csv(csv_path, compression='gzip')
+    print(f"AEI data not found at {csv_path}")
+    return pd.DataFrame()
@@ -0,0 +1,91 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.metrics import accuracy_score, f1_score, recall_score
+
+from modeling import MODELS_DIR, TURBULENCE_ENGINES, make_estimator, load_tuned_config
+from feature_store import ensure_turbulence_features, load_turbulence_features, load_turbulence_periods
+
+BACKTEST_PATH = MODELS_DIR / "turbulence_backtest.csv"
+
+def _evaluate_month(engine, params, train_start, train_end, test_end, severe_code):
+    # Rows are in time order, so every window is a contiguous slice of the memory-mapped store
+    X, y, _ = load_turbulence_features()
+    _, model = make_estimator(TURBULENCE_ENGINES, engine, params)
+    # The process pool already uses every core
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(np.array(X[train_start:train_end]), np.array(y[train_start:train_end]))
+    fit_seconds = time.perf_counter() - start
+
+    y_test = np.array(y[train_end:test_end])
+    y_pred = model.predict(np.array(X[train_end:test_end]))
+    metrics = {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1_weighted': f1_score(y_test, y_pred, average='weighted'),
+        'fit_seconds': fit_seconds,
+    }
+    if severe_code is not None:
+        metrics['severe_recall'] = recall_score(y_test, y_pred, labels=[severe_code], average='micro', zero_division=0)
+    return metrics
+
+def backtest_turbulence(engine=None, params=None, min_train_months=1, window=None, max_workers=None):
+    """
+    Rolling-origin backtest: for every month T+1 with at least min_train_months of history,
+    trains on months <= T (or only the last `window` months) and evaluates on T+1.
+    Months are evaluated in parallel. Unlike the random split in fit_turbulence_model, no
+    report from the test month (or a near-duplicate of one) can appear in training.
+    Returns one row per test month.
+    """
+    if engine is None:
+        engine, params = load_tuned_config('turbulence')
+    _, _, meta = ensure_turbulence_features()
+    if meta is None:
+        print("No turbulence features available")
+        return pd.DataFrame()
+    periods = np.asarray(load_turbulence_periods())
+    months = np.unique(periods)
+    bounds = np.searchsorted(periods, months, side='left')
+    ends = np.append(bounds[1:], len(periods))
+    severe_code = meta['classes'].index('Severe') if 'Severe' in meta['classes'] else None
+
+    jobs = []
+    for i in range(min_train_months, len(months)):
+        first = 0 if window is None else max(0, i - window)
+        jobs.append({
+            'test_month': int(months[i]),
+            'train_months': i - first,
+            'n_train': int(bounds[i] - bounds[first]),
+            'n_test': int(ends[i] - bounds[i]),
+            'args': (engine, params, int(bounds[first]), int(bounds[i]), int(ends[i]), severe_code),
+        })
+    print(f"Backtesting {len(jobs)} month(s) with {engine or 'default engine'}...")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_evaluate_month, *job.pop('args')) for job in jobs]
+        rows = [{**job, **future.result()} for job, future in zip(jobs, futures)]
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin monthly backtest of the turbulence model")
+    parser.add_argument('--engine', choices=list(TURBULENCE_ENGINES), default=None)
+    parser.add_argument('--min-train-months', type=int, default=1)
+    parser.add_argument('--window', type=int, default=None, help="Train on at most this many recent months")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    results = backtest_turbulence(args.engine, min_train_months=args.min_train_months, window=args.window,
+                                  max_workers=args.workers)
+    if not results.empty:
+        print(results.to_string(index=False))
+        results.to_csv(BACKTEST_PATH, index=False)
+        print(f"Saved backtest to {BACKTEST_PATH}")
+
+# Worker processes re-import this module on spawn-based platforms, so the backtest must not run at import
+if __name__ == "__main__":
+    main()
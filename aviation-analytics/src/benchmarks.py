@@ -0,0 +1,136 @@
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from data_preprocessing import standardize_turbulence, standardize_turbulence_series
+from pirep_parser import REPORT_PATTERNS, parse_reports, parse_reports_parallel
+from feature_store import load_turbulence_features
+from modeling import MODELS_DIR, TURBULENCE_FEATURES, TURBULENCE_ENGINES, make_estimator, engine_stats
+from scoring import predict_turbulence_batch
+
+# Raw TURBULENCE strings as they appear in the 2020 PIREP files
+SAMPLE_TURBULENCE = [
+    None, 'NEG', 'MOD', 'MOD CHOP', 'LGT CHOP', 'LGT', 'CONS LGT CHOP', 'LGT-MOD',
+    'SMOOTH', 'OCNL LGT CHOP', 'MODERATE', 'SEV', 'MOD-SEV', 'LT CHOP', 'MDT',
+    'MOD CAT', 'EXTRM', 'LIGHT CHOP', 'NONE', 'INTMT LGT CHOP',
+]
+
+def make_synthetic_pireps(n_rows, seed=42):
+    """
+    Builds a synthetic PIREP table with the raw column layout used by process_turbulence_data.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2020-01-01')
+    minutes = rng.integers(0, 365 * 24 * 60, n_rows)
+    valid = (start + pd.to_timedelta(minutes, unit='min')).strftime('%Y%m%d%H%M').astype(np.int64)
+    return pd.DataFrame({
+        'VALID': valid,
+        'LAT': rng.uniform(20, 55, n_rows),
+        'LON': rng.uniform(-130, -60, n_rows),
+        'FL': rng.integers(10, 450, n_rows) * 100.0,
+        'TURBULENCE': rng.choice(np.array(SAMPLE_TURBULENCE, dtype=object), n_rows),
+    })
+
+def _time(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def benchmark_turbulence_labels(n_rows=3_000_000):
+    """
+    Compares row-wise Series.apply labelling against the vectorized path.
+    """
+    raw = make_synthetic_pireps(n_rows)['TURBULENCE']
+    print(f"Turbulence labelling on {n_rows:,} rows")
+
+    expected, t_apply = _time(lambda s: s.apply(standardize_turbulence), raw)
+    vectorized, t_vec = _time(standardize_turbulence_series, raw)
+    categorical, t_cat = _time(standardize_turbulence_series, raw.astype('category'))
+
+    assert expected.equals(vectorized), "vectorized labels differ from standardize_turbulence"
+    assert expected.equals(categorical), "categorical labels differ from standardize_turbulence"
+
+    print(f"  Series.apply:          {t_apply:.3f}s")
+    print(f"  vectorized:            {t_vec:.3f}s ({t_apply / t_vec:.1f}x)")
+    print(f"  vectorized (category): {t_cat:.3f}s ({t_apply / t_cat:.1f}x)")
+
+# Raw REPORT strings as they appear in the 2020 PIREP files
+SAMPLE_REPORTS = [
+    "ACT UA /OV ACT040035 /TM 0000 /FL270 /TP CRJ9 /TB OCNL LGT CHOP /RM ZFW AWC-WEB:",
+    "PSG UA /OV PSG /TM 2240 /FL430 /TP LJ31 /TA M51 /WV 09061KT /TB NEG /RM (AKFSS",
+    "SLN UA /OV SLN210035/TM 1319/FL350/TP B763/TB CONT MOD CHOP OCNL MOD CAT/RM ZKC FDC",
+    "ACT UA /OV ACT130020 /TM 1117 /FL260 /TP B767 /TB LGT-MOD FL260-210 /RM FM KZHU AWC-WEB",
+    "JST UA /OV JST/TM 0237/FL280/TP MULT A/C/TB LGT/MOD CHOP /RM FL280-330",
+    "VCT UA /OV KVCT270030 /TM 1344 /FL190 /TP C421 /TA M09 /IC LGT RIME /RM FM ZHU AWC-WEB:",
+    "NGP UA /OV NGP/TM 2306/FLDURD/TP TEX2/SK BASE OVC004 TOPS UNKN",
+    "SHV UA /OV EIC /TM 2208 /FL370 /TP CRJ9 /TB INTMT LGT CHOP 350-390 /WV 27010KT",
+]
+
+def benchmark_report_parser(n_rows=2_000_000):
+    """
+    Compares per-pattern Series.str.extract (Python re) against the Arrow RE2 parser.
+    """
+    reports = pd.Series(np.resize(np.array(SAMPLE_REPORTS, dtype=object), n_rows))
+    print(f"REPORT parsing on {n_rows:,} rows")
+
+    _, t_extract = _time(lambda s: [s.str.extract(p) for p in REPORT_PATTERNS.values()], reports)
+    serial, t_arrow = _time(parse_reports, reports)
+    parallel, t_pool = _time(parse_reports_parallel, reports)
+
+    assert serial.equals(parallel), "process pool results differ from parse_reports"
+
+    print(f"  Series.str.extract: {t_extract:.3f}s (field groups only)")
+    print(f"  parse_reports:      {t_arrow:.3f}s ({n_rows / t_arrow * 60 / 1e6:.0f}M reports/min)")
+    print(f"  process pool:       {t_pool:.3f}s ({n_rows / t_pool * 60 / 1e6:.0f}M reports/min)")
+
+def benchmark_turbulence_forecast(model, le, n_hours=12, repeats=20):
+    """
+    Compares the old per-hour predict_proba loop with one batched call for a 12-hour forecast.
+    """
+    rows = [[30000, 34.0, -118.0, 1, h % 24] for h in range(n_hours)]
+
+    def per_row():
+        for row in rows:
+            model.predict_proba(pd.DataFrame([row], columns=TURBULENCE_FEATURES))
+
+    _, t_loop = _time(lambda: [per_row() for _ in range(repeats)])
+    _, t_batch = _time(lambda: [predict_turbulence_batch(model, le, rows) for _ in range(repeats)])
+
+    print(f"{n_hours}-hour forecast, mean of {repeats} runs")
+    print(f"  per-row loop: {t_loop / repeats * 1000:.1f}ms")
+    print(f"  batched:      {t_batch / repeats * 1000:.1f}ms ({t_loop / t_batch:.1f}x)")
+
+def benchmark_turbulence_engines(X, y, engines=TURBULENCE_ENGINES):
+    """
+    Fits every turbulence engine on the same split and reports accuracy, fit time,
+    pickled size and predict latency. Models are saved to a temporary directory only.
+    """
+    X = pd.DataFrame(X, columns=TURBULENCE_FEATURES, copy=False)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in engines:
+            _, model = make_estimator(engines, name)
+            _, fit_seconds = _time(model.fit, X_train, y_train)
+            path = Path(tmp) / f"{name}.pkl"
+            joblib.dump(model, path)
+            print(f"{name}: accuracy {accuracy_score(y_test, model.predict(X_test)):.3f}")
+            results[name] = engine_stats(model, path, fit_seconds, X_test)
+    return pd.DataFrame(results).T
+
+if __name__ == "__main__":
+    benchmark_turbulence_labels()
+    benchmark_report_parser()
+
+    model_path = MODELS_DIR / "turbulence_model.pkl"
+    if model_path.exists():
+        benchmark_turbulence_forecast(joblib.load(model_path), joblib.load(MODELS_DIR / "turbulence_le.pkl"))
+
+    X, y, meta = load_turbulence_features()
+    if meta is not None:
+        print(benchmark_turbulence_engines(X, y))
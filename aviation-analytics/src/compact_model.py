@@ -0,0 +1,230 @@
+import json
+import numpy as np
+from pathlib import Path
+
+def month_kernel(months, member_months, bandwidth):
+    """
+    Gaussian weight of each member month for each query month, shape (n_rows, n_members).
+    Distances wrap around the year, so December is next to January. Rows without a
+    month weight every member equally.
+    """
+    distance = np.abs(np.asarray(months, dtype=np.float64)[:, None] - np.asarray(member_months, dtype=np.float64))
+    distance = np.minimum(distance, 12 - distance)
+    return np.where(np.isnan(distance), 1.0, np.exp(-0.5 * (distance / bandwidth) ** 2))
+
+def _sklearn_tree(estimator, columns, n_out, normalize):
+    """
+    Node arrays of a fitted sklearn decision tree. Leaf values are placed into the
+    given output columns (class positions, or [0] for regressors).
+    """
+    tree = estimator.tree_
+    raw = tree.value[:, 0, :].astype(np.float64)
+    if normalize:
+        raw = raw / raw.sum(axis=1, keepdims=True)
+    value = np.zeros((tree.node_count, n_out))
+    value[:, columns] = raw
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+    return {
+        'left': tree.children_left, 'right': tree.children_right,
+        'feature': np.maximum(tree.feature, 0), 'threshold': tree.threshold,
+        'missing_left': missing_left.astype(bool), 'value': value,
+    }
+
+def _hist_tree(predictor, column, n_out):
+    """
+    Node arrays of a HistGradientBoosting TreePredictor (numerical splits only).
+    """
+    nodes = predictor.nodes
+    if nodes['is_categorical'].any():
+        raise ValueError("Categorical splits are not supported by the compact format")
+    is_leaf = nodes['is_leaf'].astype(bool)
+    value = np.zeros((len(nodes), n_out))
+    value[:, column] = nodes['value']
+    # Child indices are unsigned in the predictor, so widen before marking leaves with -1
+    return {
+        'left': np.where(is_leaf, -1, nodes['left'].astype(np.int64)),
+        'right': np.where(is_leaf, -1, nodes['right'].astype(np.int64)),
+        'feature': nodes['feature_idx'], 'threshold': nodes['num_threshold'],
+        'missing_left': nodes['missing_go_to_left'].astype(bool), 'value': value,
+    }
+
+def _flatten(model):
+    """
+    Returns (trees, weights, baseline, link, classes, input_dtype, feature_names) for a supported model.
+    """
+    classes = getattr(model, 'classes_', None)
+    n_out = len(classes) if classes is not None else 1
+
+    if hasattr(model, 'members'):
+        # incremental_training.PartitionedForestClassifier: members weighted by training rows here
+        # and by month distance at scoring time (see CompactModel._tree_weights)
+        trees, weights = [], []
+        for (_, month), member in model.members.items():
+            forest = member['model']
+            columns = np.searchsorted(classes, forest.classes_)
+            for estimator in forest.estimators_:
+                trees.append({**_sklearn_tree(estimator, columns, n_out, normalize=True), 'month': month})
+                weights.append(member['n_rows'] / len(forest.estimators_))
+        feature_names = next(iter(model.members.values()))['model'].feature_names_in_
+        return trees, weights, np.zeros(n_out), 'month_weighted', classes, 'float32', feature_names
+
+    feature_names = getattr(model, 'feature_names_in_', None)
+
+    if hasattr(model, '_predictors'):
+        # HistGradientBoosting*: one tree per class per iteration, learning rate already in leaf values
+        per_iteration = len(model._predictors[0])
+        trees = [_hist_tree(p, k, per_iteration) for it in model._predictors for k, p in enumerate(it)]
+        baseline = np.asarray(model._baseline_prediction, dtype=np.float64).ravel()
+        if classes is None:
+            link = 'identity'
+        else:
+            link = 'softmax' if per_iteration > 1 else 'logistic'
+        return trees, [1.0] * len(trees), baseline, link, classes, 'float64', feature_names
+
+    if classes is not None:
+        # RandomForestClassifier: average of per-tree class fractions
+        columns = np.arange(n_out)
+        trees = [_sklearn_tree(e, columns, n_out, normalize=True) for e in model.estimators_]
+        return trees, [1.0 / len(trees)] * len(trees), np.zeros(n_out), 'average', classes, 'float32', feature_names
+
+    # GradientBoostingRegressor (squared error): init constant plus shrunk tree outputs
+    init = model.init_
+    baseline = np.zeros(1) if init == 'zero' else np.asarray(init.constant_, dtype=np.float64).ravel()
+    trees = [_sklearn_tree(e, [0], 1, normalize=False) for e in model.estimators_[:, 0]]
+    return trees, [model.learning_rate] * len(trees), baseline, 'identity', None, 'float32', feature_names
+
+def export_compact_model(model, path, label_names=None):
+    """
+    Compiles a fitted tree ensemble into flat node arrays in one .npz file that
+    CompactModel can score with NumPy alone. Supports RandomForestClassifier,
+    GradientBoostingRegressor, HistGradientBoosting{Classifier,Regressor} and
+    PartitionedForestClassifier.
+    Args:
+        label_names: Class names of the label encoder (le.classes_), stored so the
+            labels can be decoded without unpickling the encoder.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    trees, weights, baseline, link, classes, input_dtype, feature_names = _flatten(model)
+
+    sizes = np.array([len(t['left']) for t in trees])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    # Child indices are shifted to positions in the concatenated arrays; leaves stay -1
+    left = np.concatenate([np.where(t['left'] >= 0, t['left'] + o, -1) for t, o in zip(trees, offsets)])
+    right = np.concatenate([np.where(t['right'] >= 0, t['right'] + o, -1) for t, o in zip(trees, offsets)])
+
+    meta = {
+        'link': link,
+        'input_dtype': input_dtype,
+        'feature_names': [str(f) for f in feature_names] if feature_names is not None else None,
+    }
+    if link == 'month_weighted':
+        meta['month_feature'] = [str(f) for f in feature_names].index('month')
+        meta['month_bandwidth'] = model.month_bandwidth
+    arrays = {
+        'roots': offsets.astype(np.int32),
+        'left': left.astype(np.int32),
+        'right': right.astype(np.int32),
+        'feature': np.concatenate([t['feature'] for t in trees]).astype(np.int16),
+        'threshold': np.concatenate([t['threshold'] for t in trees]).astype(np.float64),
+        'missing_left': np.concatenate([t['missing_left'] for t in trees]),
+        'value': np.concatenate([t['value'] for t in trees]),
+        'weights': np.asarray(weights, dtype=np.float64),
+        'baseline': baseline,
+        'meta': np.array(json.dumps(meta)),
+    }
+    if link == 'month_weighted':
+        arrays['tree_months'] = np.array([t['month'] for t in trees], dtype=np.int8)
+    if classes is not None:
+        arrays['classes'] = np.asarray(classes)
+    if hasattr(model, 'feature_importances_'):
+        arrays['feature_importances'] = np.asarray(model.feature_importances_, dtype=np.float64)
+    if label_names is not None:
+        arrays['label_names'] = np.asarray(label_names, dtype=str)
+    np.savez(path, **arrays)
+    print(f"Saved compact model ({len(trees)} trees, {len(left):,} nodes) to {path}")
+
+class CompactLabelEncoder:
+    """
+    Decodes class codes like a fitted LabelEncoder.
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes)]
+
+class CompactModel:
+    """
+    NumPy-only scorer for models written by export_compact_model. Exposes classes_,
+    feature_names_in_, predict and (for classifiers) predict_proba like the original estimator.
+    """
+
+    def __init__(self, path, batch_size=4096):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        meta = json.loads(str(arrays.pop('meta')))
+        self.link = meta['link']
+        self.month_feature = meta.get('month_feature')
+        self.month_bandwidth = meta.get('month_bandwidth')
+        self.input_dtype = np.dtype(meta['input_dtype'])
+        if meta['feature_names'] is not None:
+            self.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+        self.classes_ = arrays.pop('classes', None)
+        label_names = arrays.pop('label_names', None)
+        self.label_encoder = CompactLabelEncoder(label_names) if label_names is not None else None
+        if 'feature_importances' in arrays:
+            self.feature_importances_ = arrays.pop('feature_importances')
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.batch_size = batch_size
+
+    def _matrix(self, X):
+        if hasattr(X, 'columns') and hasattr(self, 'feature_names_in_'):
+            X = X[list(self.feature_names_in_)]
+        # Trees fitted by sklearn's exact splitter compare float32 inputs against float64 thresholds
+        return np.asarray(X, dtype=self.input_dtype).astype(np.float64, copy=False)
+
+    def _tree_weights(self, batch):
+        # (n_trees,) fixed weights, or (n_rows, n_trees) for month-weighted partitioned forests
+        if self.link != 'month_weighted':
+            return self.weights
+        weights = self.weights * month_kernel(batch[:, self.month_feature], self.tree_months, self.month_bandwidth)
+        return weights / weights.sum(axis=1, keepdims=True)
+
+    def _raw(self, X):
+        n_rows, n_trees = len(X), len(self.roots)
+        out = np.empty((n_rows, self.value.shape[1]))
+        for start in range(0, n_rows, self.batch_size):
+            batch = X[start:start + self.batch_size]
+            rows = np.arange(len(batch))[:, None]
+            # Walk every tree for every row at once, one level per iteration
+            node = np.broadcast_to(self.roots, (len(batch), n_trees)).copy()
+            while True:
+                left = self.left[node]
+                active = left >= 0
+                if not active.any():
+                    break
+                x = batch[rows, self.feature[node]]
+                go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+                node = np.where(active, np.where(go_left, left, self.right[node]), node)
+            weights = self._tree_weights(batch)
+            subscripts = 'ntk,nt->nk' if weights.ndim == 2 else 'ntk,t->nk'
+            out[start:start + len(batch)] = np.einsum(subscripts, self.value[node], weights)
+        return out + self.baseline
+
+    def predict_proba(self, X):
+        raw = self._raw(self._matrix(X))
+        if self.link == 'softmax':
+            exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if self.link == 'logistic':
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1 - p, p])
+        return raw
+
+    def predict(self, X):
+        if self.classes_ is None:
+            return self._raw(self._matrix(X))[:, 0]
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
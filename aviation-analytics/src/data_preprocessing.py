@@ -2,11 +2,21 @@
 import pandas as pd
 import numpy as np
 import glob
-import requests
-import zipfile
-import io
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import re
 from pathlib import Path
 
+from aei_utils import (
+    AEI_CUBE_PATH, AEI_MIN_FLIGHTS, fetch_bts_month, fetch_bts_months, iter_bts_chunks,
+    build_month_cube, load_cube, save_cube, cube_months, merge_cube, rollup_cube
+)
+from turbulence_store import (
+    TURBULENCE_STORE_DIR, ICING_STORE_DIR, STORE_SCHEMA_VERSION, to_store_dtypes, write_turbulence_partitions,
+    remove_source_partitions, has_source_partitions, clear_store, load_manifest, save_manifest, file_fingerprint
+)
+from turbulence_utils import write_cube_fragment, remove_cube_fragment, has_cube_fragment
+from pirep_parser import parse_reports, normalize_reports
+
 def standardize_turbulence(text):
     """
     Standardizes turbulence text labels into categories: 'Severe', 'Moderate', 'Light', 'None'.
@@ -26,9 +36,173 @@ def standardize_turbulence(text):
     
     return None
 
+# Keyword rules mirroring standardize_turbulence, checked in order (first match wins)
+TURBULENCE_RULES = [
+    ('Severe', ['SEV', 'EXTRM']),
+    ('Moderate', ['MOD']),
+    ('Light', ['LGT', 'LIGHT']),
+    ('None', ['NEG', 'SMOOTH', 'NONE']),
+]
+
+def standardize_labels(raw, rules):
+    """
+    Vectorized keyword classification of a Series of raw text labels.
+    Each distinct raw value is classified once and the result is mapped back
+    through the factorized codes, so the cost scales with the number of unique
+    strings rather than the number of rows. Categorical input reuses its categories.
+    """
+    if isinstance(raw.dtype, pd.CategoricalDtype):
+        codes = raw.cat.codes.to_numpy()
+        uniques = raw.cat.categories
+    else:
+        codes, uniques = pd.factorize(raw)
+
+    upper = pd.Index(uniques).astype(str).str.upper()
+    conditions = [
+        upper.str.contains('|'.join(re.escape(k) for k in keywords), regex=True)
+        for _, keywords in rules
+    ]
+    choices = [np.full(len(upper), label, dtype=object) for label, _ in rules]
+    labels = np.select(conditions, choices, default=None)
+
+    # Missing values have code -1, which picks the trailing None
+    labels = np.append(labels, None)
+    return pd.Series(labels[codes], index=raw.index, dtype=object)
+
+def standardize_turbulence_series(raw):
+    """
+    Vectorized equivalent of applying standardize_turbulence to every row.
+    """
+    return standardize_labels(raw, TURBULENCE_RULES)
+
+# Icing intensities on the same scale as turbulence; trace icing counts as Light.
+# 'LT ' needs its space so it only matches the abbreviation (e.g. "LT RIME").
+ICING_RULES = [
+    ('Severe', ['SEV', 'HVY', 'HEAVY', 'EXTRM']),
+    ('Moderate', ['MOD', 'MDT']),
+    ('Light', ['LGT', 'LIGHT', 'LT ', 'TRACE', 'TRC']),
+    ('None', ['NEG', 'NONE', 'NIL', 'NO ICING']),
+]
+
+def standardize_icing_series(raw):
+    """
+    Labels raw ICING strings as 'Severe', 'Moderate', 'Light' or 'None'.
+    """
+    return standardize_labels(raw, ICING_RULES)
+
+PIREP_COLUMNS = ['VALID', 'AIRCRAFT', 'LAT', 'LON', 'FL', 'TURBULENCE', 'ICING', 'REPORT']
+
+# Two rows are the same report when these match and their REPORT text normalizes equal
+PIREP_KEY_COLUMNS = ['VALID', 'AIRCRAFT', 'FL', 'LAT', 'LON']
+
+# Raw rows read per chunk; bounds the memory of one file being cleaned
+PIREP_CHUNK_ROWS = 100_000
+
+class PirepDeduplicator:
+    """
+    Streaming removal of exact and near-duplicate PIREPs.
+    Each row is reduced to a 64-bit hash of PIREP_KEY_COLUMNS plus the normalized REPORT,
+    and hashes are kept in one array per VALID hour. Duplicates share VALID, so only the
+    max_windows most recent hours are retained, which bounds memory for time-ordered
+    input of any length.
+    """
+
+    def __init__(self, max_windows=48):
+        self.max_windows = max_windows
+        self.windows = {}
+        self.removed = 0
+
+    def filter(self, df):
+        """
+        Returns the rows of a raw chunk not seen before, in their original order.
+        """
+        keys = df[PIREP_KEY_COLUMNS].assign(REPORT=normalize_reports(df['REPORT']))
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        # VALID is YYYYMMDDHHMM, so dropping the minutes gives the hour window
+        windows = pd.to_numeric(df['VALID'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64) // 100
+
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        for window in np.unique(windows):
+            in_window = windows == window
+            seen = self.windows.get(window)
+            if seen is not None:
+                keep[in_window] &= ~np.isin(hashes[in_window], seen)
+            new = hashes[in_window & keep]
+            self.windows[window] = new if seen is None else np.concatenate([seen, new])
+
+        for window in sorted(self.windows)[:-self.max_windows]:
+            del self.windows[window]
+        self.removed += int((~keep).sum())
+        return df[keep]
+
+def clean_pirep_frame(df):
+    """
+    Renames raw PIREP columns, parses timestamps and coordinates, labels turbulence
+    and icing intensity and drops rows that carry neither label or fall outside valid
+    lat/lon bounds. When the REPORT text is present, the pirep_parser fields are added in its place.
+    """
+    # Only needed as a duplicate key; the parsed /TP group carries the aircraft type
+    df = df.drop(columns=['AIRCRAFT'], errors='ignore')
+    df = df.rename(columns={
+        'VALID': 'timestamp',
+        'LAT': 'latitude',
+        'LON': 'longitude',
+        'FL': 'altitude',
+        'TURBULENCE': 'raw_turbulence',
+        'ICING': 'raw_icing'
+    })
+    
+    # Cleaning
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='%Y%m%d%H%M', errors='coerce')
+    df['turbulence_intensity'] = standardize_turbulence_series(df['raw_turbulence'])
+    if 'raw_icing' in df.columns:
+        df['icing_intensity'] = standardize_icing_series(df['raw_icing'])
+    
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+    df['altitude'] = pd.to_numeric(df['altitude'], errors='coerce')
+    
+    df = df.dropna(subset=['timestamp', 'latitude', 'longitude'])
+    labels = [c for c in ['turbulence_intensity', 'icing_intensity'] if c in df.columns]
+    df = df.dropna(subset=labels, how='all')
+    
+    df = df[
+        (df['latitude'] >= -90) & (df['latitude'] <= 90) &
+        (df['longitude'] >= -180) & (df['longitude'] <= 180)
+    ]
+    
+    # Parsed after filtering so dropped rows cost nothing
+    if 'REPORT' in df.columns:
+        df = pd.concat([df.drop(columns='REPORT'), parse_reports(df['REPORT'])], axis=1)
+    
+    return df
+
+# Columns that only describe one of the two hazards
+TURBULENCE_ONLY_COLUMNS = ['raw_turbulence', 'turbulence_intensity', 'turbulence_frequency', 'turbulence_type',
+                           'turbulence_base', 'turbulence_top']
+ICING_ONLY_COLUMNS = ['raw_icing', 'icing_intensity']
+
+def split_pirep_frame(df):
+    """
+    Splits a clean_pirep_frame result into (turbulence reports, icing reports).
+    A report that labels both hazards appears in both.
+    """
+    turbulence = df[df['turbulence_intensity'].notna()].drop(columns=ICING_ONLY_COLUMNS, errors='ignore')
+    if 'icing_intensity' not in df.columns:
+        return turbulence, pd.DataFrame()
+    icing = df[df['icing_intensity'].notna()].drop(columns=TURBULENCE_ONLY_COLUMNS, errors='ignore')
+    return turbulence, icing
+
+def clean_turbulence_frame(df):
+    """
+    Cleans raw PIREP rows and keeps only those with a turbulence label.
+    """
+    return split_pirep_frame(clean_pirep_frame(df))[0]
+
 def process_turbulence_data(raw_dir_path):
     """
     Loads and processes PIREPs CSV files from the specified directory.
+    Duplicate reports are dropped per file.
     Returns a cleaned DataFrame.
     """
     raw_dir = Path(raw_dir_path)
@@ -38,8 +212,10 @@ def process_turbulence_data(raw_dir_path):
     df_list = []
     for filename in all_files:
         try:
-            # Optimize: Reading chunks if needed, but lets try full
-            df = pd.read_csv(filename, usecols=['VALID', 'LAT', 'LON', 'FL', 'TURBULENCE'])
+            dedup = PirepDeduplicator()
+            chunks = pd.read_csv(filename, usecols=PIREP_COLUMNS, chunksize=PIREP_CHUNK_ROWS)
+            df = pd.concat([dedup.filter(chunk) for chunk in chunks], ignore_index=True)
+            print(f"Removed {dedup.removed} duplicate rows from {Path(filename).name}")
             df_list.append(df)
         except Exception as e:
             print(f"Error reading {filename}: {e}")
@@ -49,138 +225,191 @@ def process_turbulence_data(raw_dir_path):
         
     combined_df = pd.concat(df_list, ignore_index=True)
     
-    combined_df = combined_df.rename(columns={
-        'VALID': 'timestamp',
-        'LAT': 'latitude',
-        'LON': 'longitude',
-        'FL': 'altitude',
-        'TURBULENCE': 'raw_turbulence'
-    })
+    return clean_turbulence_frame(combined_df)
+
+def clean_pirep_file(filename):
+    """
+    Reads, deduplicates and cleans a single PIREP CSV file in chunks. Runs inside worker processes.
+    Returns (raw row count, duplicate rows removed, clean_pirep_frame DataFrame); the counts are
+    None if the file could not be read.
+    """
+    dedup = PirepDeduplicator()
+    raw_rows = 0
+    cleaned = []
+    try:
+        for chunk in pd.read_csv(filename, usecols=PIREP_COLUMNS, chunksize=PIREP_CHUNK_ROWS):
+            raw_rows += len(chunk)
+            cleaned.append(clean_pirep_frame(dedup.filter(chunk)))
+    except Exception as e:
+        print(f"Error reading {filename}: {e}")
+        return None, None, pd.DataFrame()
+    if not cleaned:
+        return raw_rows, dedup.removed, pd.DataFrame()
+    return raw_rows, dedup.removed, pd.concat(cleaned, ignore_index=True)
+
+def iter_pirep_partitions(files, max_in_flight=4):
+    """
+    Cleans PIREP files in a process pool and yields (filename, raw_rows, duplicate_rows, DataFrame)
+    as they finish. Each DataFrame holds both turbulence and icing reports (see split_pirep_frame).
+    At most max_in_flight files are being parsed or waiting to be consumed at any time,
+    which bounds peak memory independently of how many files are processed.
+    """
+    pending_files = list(files)
+    if not pending_files:
+        return
     
-    # Cleaning
-    combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'], format='%Y%m%d%H%M', errors='coerce')
-    combined_df['turbulence_intensity'] = combined_df['raw_turbulence'].apply(standardize_turbulence)
+    with ProcessPoolExecutor(max_workers=max_in_flight) as pool:
+        in_flight = {}
+        while pending_files or in_flight:
+            while pending_files and len(in_flight) < max_in_flight:
+                filename = pending_files.pop(0)
+                in_flight[pool.submit(clean_pirep_file, filename)] = filename
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename = in_flight.pop(future)
+                raw_rows, duplicate_rows, df = future.result()
+                yield filename, raw_rows, duplicate_rows, df
+
+def _partitions_present(entry, source_name, store_dir, icing_store_dir):
+    # A source with rows for a store must have at least one partition file there,
+    # and its turbulence rows a filter cube fragment
+    return ((not entry.get('clean_rows') or (has_source_partitions(source_name, store_dir)
+                                             and has_cube_fragment(source_name, store_dir)))
+            and (not entry.get('icing_rows') or has_source_partitions(source_name, icing_store_dir)))
+
+def process_turbulence_data_streaming(raw_dir_path, store_dir=TURBULENCE_STORE_DIR, max_in_flight=4, full_refresh=False,
+                                      icing_store_dir=ICING_STORE_DIR):
+    """
+    Parallel counterpart of process_turbulence_data that writes each cleaned file
+    straight into the partitioned turbulence store instead of concatenating in memory.
+    Icing reports from the same pass go to the icing store, so they cost no extra scan,
+    and each file's filter cube fragment is written next to its partitions.
+    Only raw files that are new or changed since the last run (per the store manifest),
+    or whose partitions are missing from either store, are cleaned, and partitions of raw
+    files that no longer exist are deleted; pass full_refresh=True to rebuild both stores
+    from scratch.
+    Returns the number of turbulence rows written.
+    """
+    raw_dir = Path(raw_dir_path)
+    all_files = sorted(glob.glob(str(raw_dir / "*.csv")))
+    print(f"Found {len(all_files)} files in {raw_dir}")
     
-    combined_df['latitude'] = pd.to_numeric(combined_df['latitude'], errors='coerce')
-    combined_df['longitude'] = pd.to_numeric(combined_df['longitude'], errors='coerce')
-    combined_df['altitude'] = pd.to_numeric(combined_df['altitude'], errors='coerce')
+    if full_refresh:
+        clear_store(store_dir)
+        clear_store(icing_store_dir)
+    manifest = load_manifest(store_dir)
     
-    combined_df = combined_df.dropna(subset=['timestamp', 'latitude', 'longitude', 'turbulence_intensity'])
+    removed_files = sorted(set(manifest) - set(all_files))
+    for filename in removed_files:
+        remove_source_partitions(Path(filename).stem, store_dir)
+        remove_source_partitions(Path(filename).stem, icing_store_dir)
+        remove_cube_fragment(Path(filename).stem, store_dir)
+        del manifest[filename]
+    if removed_files:
+        print(f"Removed partitions of {len(removed_files)} deleted files")
+        save_manifest(manifest, store_dir)
     
-    combined_df = combined_df[
-        (combined_df['latitude'] >= -90) & (combined_df['latitude'] <= 90) &
-        (combined_df['longitude'] >= -180) & (combined_df['longitude'] <= 180)
-    ]
+    changed_files = {}
+    for filename in all_files:
+        entry = manifest.get(filename)
+        fingerprint = file_fingerprint(filename, entry)
+        # Files cleaned under an older store schema are reprocessed to gain the new columns,
+        # and files whose partitions were deleted from either store are written again
+        if (entry is not None and entry['sha256'] == fingerprint['sha256']
+                and entry.get('schema') == STORE_SCHEMA_VERSION
+                and _partitions_present(entry, Path(filename).stem, store_dir, icing_store_dir)):
+            # Unchanged content; refresh size/mtime so the hash is skipped next time
+            entry.update(fingerprint)
+        else:
+            changed_files[filename] = fingerprint
+    print(f"{len(changed_files)} new or changed files to process")
     
-    return combined_df
+    total_rows = 0
+    for filename, raw_rows, duplicate_rows, df in iter_pirep_partitions(changed_files, max_in_flight=max_in_flight):
+        if raw_rows is None:
+            continue
+        source_name = Path(filename).stem
+        turbulence_df, icing_df = split_pirep_frame(df) if not df.empty else (df, df)
+        remove_source_partitions(source_name, store_dir)
+        write_turbulence_partitions(turbulence_df, source_name, store_dir)
+        # Built from store dtypes so the fragment bins exactly what was written
+        write_cube_fragment(to_store_dtypes(turbulence_df) if not turbulence_df.empty else turbulence_df,
+                            source_name, store_dir)
+        remove_source_partitions(source_name, icing_store_dir)
+        write_turbulence_partitions(icing_df, source_name, icing_store_dir)
+        total_rows += len(turbulence_df)
+        print(f"Cleaned {Path(filename).name}: {len(turbulence_df)} turbulence and {len(icing_df)} icing rows "
+              f"({duplicate_rows} duplicates removed)")
+        
+        manifest[filename] = {**changed_files[filename], 'raw_rows': raw_rows, 'duplicate_rows': duplicate_rows,
+                              'clean_rows': len(turbulence_df), 'icing_rows': len(icing_df),
+                              'schema': STORE_SCHEMA_VERSION}
+        # Saved after every file so an interrupted run resumes where it stopped
+        save_manifest(manifest, store_dir)
+    
+    save_manifest(manifest, store_dir)
+    return total_rows
 
-def download_aei_month(year: int, month: int) -> pd.DataFrame:
+def read_aei_month(zip_path) -> pd.DataFrame:
     """
-    Downloads and returns a specific month of BTS On-Time Performance data.
+    Reads the selected On-Time Performance columns from a cached BTS month zip.
+    Prefer aggregate_bts_month when only per-group sums are needed.
     """
-    url = (
-        "https://transtats.bts.gov/"
-        f"PREZIP/On_Time_Reporting_Carrier_On_Time_Performance_1987_present_{year}_{month}.zip"
-    )
-    print(f"Downloading AEI data for {year}-{month}...")
     try:
-        r = requests.get(url, verify=False) # Verify=False sometimes needed for BTS legacy certs, but try standard first if possible. 
-        # Note: requests.get might fail with SSL error on some envs for BTS. 
-        # If verify=False is needed, we'll add it. For now, assuming standard.
-        # Actually, let's use verify=False to be safe as BTS certs are often tricky, 
-        # but suppression of warnings is needed.
-        
-        r.raise_for_status()
-
-        with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
-            csv_name = [n for n in zf.namelist() if n.lower().endswith(".csv")][0]
-            with zf.open(csv_name) as f:
-                # Read only necessary columns to save memory
-                # Columns: Year, Month, DayofMonth, FlightDate, Reporting_Airline, Origin, Dest, DepDelay, ArrDelay, Cancelled, Diverted
-                cols = [
-                    'Year', 'Month', 'DayofMonth', 'Reporting_Airline', 
-                    'Origin', 'Dest', 'DepDelay', 'ArrDelay', 'Cancelled', 'Diverted'
-                ]
-                # BTS columns are often mixed case, but let's try to match standard names or read all then filter
-                # To be safe, read header first? No, just read all and filter columns by name case-insensitive
-                df = pd.read_csv(f, nrows=1)
-                available_cols = df.columns.tolist()
-                use_cols = [c for c in available_cols if c in cols or c.upper() in [x.upper() for x in cols]]
-                
-                f.seek(0)
-                df = pd.read_csv(f, usecols=use_cols)
-                
-                # Standardize column names
-                df.columns = [c.upper() for c in df.columns] # ORIGIN, DEST, DEPDELAY...
-                
-                # Map DEPDELAY to DEP_DELAY if needed (BTS usually has DepDelay or DEP_DELAY)
-                # Let's check what we have
-                rename_map = {}
-                for c in df.columns:
-                    if c == 'DEPDELAY': rename_map[c] = 'DEP_DELAY'
-                    if c == 'ARRDELAY': rename_map[c] = 'ARR_DELAY'
-                df = df.rename(columns=rename_map)
-                
-                return df
+        return pd.concat(iter_bts_chunks(zip_path), ignore_index=True)
     except Exception as e:
-        print(f"Failed to download/process {year}-{month}: {e}")
+        print(f"Failed to process {zip_path}: {e}")
+        return pd.DataFrame()
+
+def download_aei_month(year: int, month: int) -> pd.DataFrame:
+    """
+    Downloads (or loads from the local zip cache) and returns a specific month of BTS On-Time Performance data.
+    """
+    print(f"Downloading AEI data for {year}-{month}...")
+    zip_path = fetch_bts_month(year, month)
+    if zip_path is None:
         return pd.DataFrame()
+    return read_aei_month(zip_path)
 
-def process_aei_chunks(years, months):
+def process_aei_chunks(years, months, max_workers=4, cube_path=AEI_CUBE_PATH):
     """
     Downloads and aggregates AEI data for specified years and months.
+    Each month is streamed into the persisted AEI cube (origin, dest, carrier, year, month);
+    months already in the cube are not downloaded again. Missing months are fetched
+    concurrently into the local zip cache before aggregation.
     Returns an aggregated DataFrame with efficiency metrics per airport.
     """
-    aggregated_stats = []
-    
-    for year in years:
-        for month in months:
-            df = download_aei_month(year, month)
-            if not df.empty:
-                # Aggregate per month to save memory
-                # We need: Origin, Count, Sum(DepDelay), Sum(Cancelled)
-                
-                # Ensure columns exist
-                if 'DEP_DELAY' not in df.columns:
-                    # Try to find it
-                    print(f"DEP_DELAY missing in {year}-{month}. Cols: {df.columns}")
-                    continue
-                    
-                # Fill NA delays with 0 for calculation (or drop?) 
-                # Usually cancelled flights have NaN delay. 
-                # We want to count cancellations separately.
-                
-                df['is_cancelled'] = df['CANCELLED'].fillna(0)
-                df['dep_delay_clean'] = df['DEP_DELAY'].fillna(0)
-                
-                stats = df.groupby('ORIGIN').agg(
-                    total_flights=('ORIGIN', 'count'),
-                    total_dep_delay=('dep_delay_clean', 'sum'),
-                    total_cancelled=('is_cancelled', 'sum')
-                ).reset_index()
-                
-                stats['year'] = year
-                stats['month'] = month
-                aggregated_stats.append(stats)
-    
-    if not aggregated_stats:
-        return pd.DataFrame()
-        
-    # Combine all monthly stats
-    all_stats = pd.concat(aggregated_stats, ignore_index=True)
+    cube = load_cube(cube_path)
+    done_months = cube_months(cube)
+    year_months = [(year, month) for year in years for month in months]
+    missing = [ym for ym in year_months if ym not in done_months]
+    print(f"{len(year_months) - len(missing)} months already in AEI cube, "
+          f"fetching {len(missing)} ({max_workers} concurrent downloads)...")
+    zip_paths = fetch_bts_months(missing, max_workers=max_workers)
     
-    # Final Aggregation per Airport
-    final_efficiency = all_stats.groupby('ORIGIN').agg(
-        total_flights=('total_flights', 'sum'),
-        total_dep_delay=('total_dep_delay', 'sum'),
-        total_cancelled=('total_cancelled', 'sum')
-    ).reset_index()
+    for year, month in missing:
+        if zip_paths[(year, month)] is None:
+            continue
+        try:
+            # Streamed sums; the month is never fully loaded
+            month_cube = build_month_cube(zip_paths[(year, month)])
+        except Exception as e:
+            print(f"Failed to process {year}-{month}: {e}")
+            continue
+        if month_cube.empty:
+            continue
+        cube = merge_cube(cube, month_cube)
+        # Persist after every month so an interrupted run keeps its progress
+        save_cube(cube, cube_path)
+    
+    if cube.empty:
+        return pd.DataFrame()
     
-    # Calculate Metrics
-    final_efficiency['avg_dep_delay'] = final_efficiency['total_dep_delay'] / final_efficiency['total_flights']
-    final_efficiency['cancellation_rate'] = final_efficiency['total_cancelled'] / final_efficiency['total_flights']
+    # Final Aggregation per Airport over the requested period
+    final_efficiency = rollup_cube(cube, ['ORIGIN'], years=list(years), months=list(months))
     
     # Filter for significant airports (e.g. > 1000 flights total in the period)
-    final_efficiency = final_efficiency[final_efficiency['total_flights'] > 1000]
+    final_efficiency = final_efficiency[final_efficiency['total_flights'] > AEI_MIN_FLIGHTS]
     
     return final_efficiency
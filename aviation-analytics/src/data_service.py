@@ -0,0 +1,130 @@
+import threading
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+from turbulence_store import TURBULENCE_STORE_DIR, ICING_STORE_DIR, read_turbulence, read_icing
+from turbulence_utils import CUBE_COLUMNS, TURBULENCE_CUBE_PATH, cube_fragments_dir, ensure_filter_cube
+from aei_utils import AEI_CUBE_PATH, load_cube
+
+PROCESSED_DIR = Path("aviation-analytics/data/processed")
+ARROW_CACHE_DIR = PROCESSED_DIR / "_arrow_cache"
+
+# Process-wide state: every Streamlit session and page shares the same loaded frames,
+# kept as {name: (DataFrame, newest source mtime when loaded)}
+_LOADERS = {}
+_DATASETS = {}
+_LOCKS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def register_dataset(name, loader, sources):
+    """
+    Registers a dataset loader.
+    Args:
+        loader: Zero-argument function returning a DataFrame.
+        sources (list): Files or directories the dataset is derived from; the Arrow
+            cache is rebuilt when any of them is newer than the cached file.
+    """
+    _LOADERS[name] = (loader, [Path(s) for s in sources])
+
+def _latest_mtime(paths):
+    mtimes = []
+    for path in paths:
+        if path.is_dir():
+            mtimes.extend(p.stat().st_mtime for p in path.rglob('*') if p.is_file())
+        elif path.exists():
+            mtimes.append(path.stat().st_mtime)
+    return max(mtimes, default=None)
+
+def _write_arrow(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One chunk per column and no compression, so columns can be mapped without copying
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp_path.replace(path)
+
+def _map_arrow(path):
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps each column separate so null-free numeric columns stay views of the
+    # mapped file; those arrays are read-only, which is what makes sharing across sessions safe
+    return table.to_pandas(split_blocks=True)
+
+def _load(name, source_mtime):
+    loader, _ = _LOADERS[name]
+    cache_path = ARROW_CACHE_DIR / f"{name}.arrow"
+
+    if cache_path.exists() and (source_mtime is None or cache_path.stat().st_mtime >= source_mtime):
+        return _map_arrow(cache_path)
+
+    df = loader()
+    if df.empty:
+        return df
+    _write_arrow(df, cache_path)
+    return _map_arrow(cache_path)
+
+def get_dataset_with_version(name):
+    """
+    Returns (DataFrame, version) for a registered dataset, loading it on first use.
+    Every call re-checks the source mtimes, so a frame is reloaded once the pipeline rewrites
+    its sources; the version is the newest source mtime the frame was loaded from, for keying
+    anything derived from it (e.g. a spatial index). Empty results are not kept, so a dataset
+    missing at first access appears later.
+    """
+    source_mtime = _latest_mtime(_LOADERS[name][1])
+    loaded = _DATASETS.get(name)
+    if loaded is not None and loaded[1] == source_mtime:
+        return loaded
+    with _REGISTRY_LOCK:
+        lock = _LOCKS.setdefault(name, threading.Lock())
+    # Per-dataset lock so concurrent sessions wait for one load instead of each loading
+    with lock:
+        loaded = _DATASETS.get(name)
+        if loaded is not None and loaded[1] == source_mtime:
+            return loaded
+        df = _load(name, source_mtime)
+        if not df.empty:
+            _DATASETS[name] = (df, source_mtime)
+    return df, source_mtime
+
+def get_dataset(name):
+    """
+    Returns the shared, read-only DataFrame for a registered dataset (see get_dataset_with_version).
+    Callers must not modify the frame in place; derive new columns on a copy of the slice they need.
+    """
+    return get_dataset_with_version(name)[0]
+
+def clear_datasets():
+    """
+    Drops all loaded datasets so the next access reloads them.
+    """
+    _DATASETS.clear()
+
+def _load_turbulence():
+    return read_turbulence(columns=['timestamp', 'latitude', 'longitude', 'altitude', 'turbulence_intensity'])
+
+def _load_icing():
+    return read_icing(columns=['timestamp', 'latitude', 'longitude', 'altitude', 'icing_intensity', 'temperature_c'])
+
+def _load_turbulence_cube():
+    # Normally a no-op: process_all.py merges the fragments right after ingestion
+    ensure_filter_cube()
+    if TURBULENCE_CUBE_PATH.exists():
+        return pd.read_parquet(TURBULENCE_CUBE_PATH)
+    # Keeps the cube columns so slicing an absent cube gives empty results, not a KeyError
+    return pd.DataFrame(columns=CUBE_COLUMNS)
+
+def _load_airport_efficiency():
+    path = PROCESSED_DIR / "airport_efficiency.csv.gz"
+    if path.exists():
+        return pd.read_csv(path, compression='gzip')
+    return pd.DataFrame()
+
+register_dataset('turbulence', _load_turbulence, [TURBULENCE_STORE_DIR])
+register_dataset('icing', _load_icing, [ICING_STORE_DIR])
+register_dataset('turbulence_cube', _load_turbulence_cube, [TURBULENCE_CUBE_PATH, cube_fragments_dir()])
+register_dataset('aei_cube', load_cube, [AEI_CUBE_PATH])
+register_dataset('airport_efficiency', _load_airport_efficiency, [PROCESSED_DIR / "airport_efficiency.csv.gz"])
@@ -0,0 +1,228 @@
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+from turbulence_store import file_fingerprint
+
+# BTS Airline On-Time Statistics and Delay Causes export, checked in order
+DELAY_CAUSE_PATHS = [
+    "../../Airline_Delay_Cause.csv",
+    "Airline_Delay_Cause.csv",
+    "/mount/src/mgta-452-final-project/aviation-analytics/Airline_Delay_Cause.csv"
+]
+
+DELAY_CAUSE_CACHE_DIR = Path("aviation-analytics/data/processed/_delay_cause_cache")
+
+DELAY_COUNT_COLUMNS = [
+    'arr_flights', 'arr_del15', 'carrier_ct', 'weather_ct', 'nas_ct', 'security_ct', 'late_aircraft_ct',
+    'arr_cancelled', 'arr_diverted',
+]
+
+DELAY_MINUTE_COLUMNS = [
+    'arr_delay', 'carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay',
+]
+
+# Delay minutes by cause, the inputs of the factor-importance regression
+DELAY_CAUSE_FACTORS = ['carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay']
+
+# Codes and names repeat on every row, so they are stored once per category.
+# Metrics are fractional in the export (e.g. carrier_ct 1.43) and can be blank.
+DELAY_CAUSE_DTYPES = {
+    'year': 'int16',
+    'month': 'int8',
+    'carrier': 'category',
+    'carrier_name': 'category',
+    'airport': 'category',
+    'airport_name': 'category',
+    **{column: 'float32' for column in DELAY_COUNT_COLUMNS + DELAY_MINUTE_COLUMNS},
+}
+
+def find_delay_cause_file(paths=DELAY_CAUSE_PATHS):
+    """
+    Returns the first existing delay-cause CSV, or None.
+    """
+    return next((Path(p) for p in paths if Path(p).exists()), None)
+
+def read_delay_causes(path):
+    """
+    Parses the delay-cause CSV into compact dtypes and adds delay_rate and a month timestamp.
+    Rows without arrivals are dropped so delay_rate is always defined.
+    """
+    df = pd.read_csv(path, dtype=DELAY_CAUSE_DTYPES)
+    df = df[df['arr_flights'] > 0].reset_index(drop=True)
+    df['delay_rate'] = df['arr_del15'] / df['arr_flights']
+    # Months since the epoch map straight onto datetime64[M]; no per-row string parsing
+    months = (df['year'].to_numpy(dtype=np.int64) - 1970) * 12 + df['month'].to_numpy(dtype=np.int64) - 1
+    df['timestamp'] = months.astype('datetime64[M]').astype('datetime64[ns]')
+    return df
+
+def _write_cache(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Uncompressed single-chunk IPC so numeric columns are mapped, not decoded
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp_path.replace(path)
+
+def _map_cache(path):
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+def delay_cause_version(path=None, cache_dir=DELAY_CAUSE_CACHE_DIR):
+    """
+    Short SHA-256 of the delay-cause CSV, or None when no file is found.
+    The hash is only recomputed when the file's size or mtime changes.
+    """
+    path = Path(path) if path is not None else find_delay_cause_file()
+    if path is None or not path.exists():
+        return None
+    cache_dir = Path(cache_dir)
+    index_path = cache_dir / "_index.json"
+    index = {}
+    if index_path.exists():
+        with open(index_path) as f:
+            index = json.load(f)
+
+    key = str(path.resolve())
+    fingerprint = file_fingerprint(path, index.get(key))
+    if index.get(key) != fingerprint:
+        index[key] = fingerprint
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Pages call this on every rerun, from concurrent sessions, so each writer gets its
+        # own temporary file and readers only ever see a complete index
+        with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as f:
+            json.dump(index, f, indent=2)
+        Path(f.name).replace(index_path)
+    return fingerprint['sha256'][:16]
+
+def load_delay_causes(path=None, cache_dir=DELAY_CAUSE_CACHE_DIR):
+    """
+    Returns the delay-cause table, parsing the CSV only the first time a given file
+    content is seen. Later loads memory-map the cached Arrow file named after the
+    content hash, so categorical codes and float32 columns come back without parsing.
+    Returns an empty DataFrame when no CSV is found.
+    """
+    path = Path(path) if path is not None else find_delay_cause_file()
+    if path is None:
+        return pd.DataFrame()
+    version = delay_cause_version(path, cache_dir)
+    cache_path = Path(cache_dir) / f"{version}.arrow"
+    if not cache_path.exists():
+        print(f"Parsing {path}...")
+        _write_cache(read_delay_causes(path), cache_path)
+        # Caches of earlier file versions are never read again
+        for stale in Path(cache_dir).glob("*.arrow"):
+            if stale != cache_path:
+                stale.unlink()
+    return _map_cache(cache_path)
+
+def build_delay_summary(df, top_volume=50, top_delay=20):
+    """
+    Computes every rollup shown on the Airline Comparisons page:
+        totals             total flights, delayed flights and mean delay rate
+        carrier_delay      mean delay rate per carrier, ascending
+        airport_delay      the top_delay highest mean delay rates among the top_volume busiest airports
+        cause_means        mean delay minutes per cause, ascending
+        monthly_trend      mean delay rate per month
+        factor_importance  regression coefficients of monthly delay rate on monthly cause minutes
+    Returns {'totals': dict, name: DataFrame, ...}.
+    """
+    # Accumulate in float64 so totals over many years of float32 rows stay exact
+    totals = {
+        'arr_flights': float(df['arr_flights'].astype('float64').sum()),
+        'arr_del15': float(df['arr_del15'].astype('float64').sum()),
+        'delay_rate': float(df['delay_rate'].mean()),
+    }
+
+    carrier_delay = df.groupby('carrier', observed=True)['delay_rate'].mean().sort_values().reset_index()
+
+    busiest = df.groupby('airport', observed=True)['arr_flights'].sum().nlargest(top_volume).index
+    airport_delay = (df[df['airport'].isin(busiest)].groupby('airport', observed=True)['delay_rate'].mean()
+                     .sort_values().tail(top_delay).reset_index())
+
+    cause_means = df[DELAY_CAUSE_FACTORS].mean().reset_index()
+    cause_means.columns = ['Cause', 'Average Minutes']
+    cause_means = cause_means.sort_values('Average Minutes')
+
+    # Monthly means reduce noise, as in the delay analysis notebook
+    monthly = df.groupby('timestamp')[DELAY_CAUSE_FACTORS + ['delay_rate']].mean().astype('float64')
+    monthly_trend = monthly['delay_rate'].reset_index()
+
+    # Least squares on centred data gives the same slopes as LinearRegression with an intercept
+    X = monthly[DELAY_CAUSE_FACTORS].to_numpy()
+    y = monthly['delay_rate'].to_numpy()
+    coef = np.linalg.lstsq(X - X.mean(axis=0), y - y.mean(), rcond=None)[0]
+    factor_importance = pd.DataFrame({'Factor': DELAY_CAUSE_FACTORS, 'Coefficient': coef})
+    factor_importance['Abs_Coefficient'] = factor_importance['Coefficient'].abs()
+    # 0-1 scale for the radar chart
+    low, high = factor_importance['Abs_Coefficient'].min(), factor_importance['Abs_Coefficient'].max()
+    factor_importance['Normalized Importance'] = (factor_importance['Abs_Coefficient'] - low) / (high - low)
+
+    return {
+        'totals': totals,
+        'carrier_delay': carrier_delay,
+        'airport_delay': airport_delay,
+        'cause_means': cause_means,
+        'monthly_trend': monthly_trend,
+        'factor_importance': factor_importance,
+    }
+
+def _summary_path(version, cache_dir):
+    return Path(cache_dir) / f"{version}_summary.json"
+
+def save_delay_summary(summary, version, cache_dir=DELAY_CAUSE_CACHE_DIR):
+    """
+    Writes a build_delay_summary result as one small JSON file named after the data version.
+    """
+    # Categorical codes are written as plain strings and timestamps as ISO dates
+    tables = {name: json.loads(table.to_json(orient='split', index=False, date_format='iso'))
+              for name, table in summary.items() if name != 'totals'}
+
+    path = _summary_path(version, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': version, 'totals': summary['totals'], 'tables': tables}, f)
+    tmp_path.replace(path)
+    for stale in Path(cache_dir).glob("*_summary.json"):
+        if stale != path:
+            stale.unlink()
+
+def ensure_delay_summary(path=None, cache_dir=DELAY_CAUSE_CACHE_DIR):
+    """
+    Builds and saves the page summary unless one exists for the current data version.
+    Returns the version, or None when no delay-cause CSV is found.
+    """
+    version = delay_cause_version(path, cache_dir)
+    if version is None:
+        return None
+    if not _summary_path(version, cache_dir).exists():
+        df = load_delay_causes(path, cache_dir)
+        save_delay_summary(build_delay_summary(df), version, cache_dir)
+        print(f"Saved delay-cause summary to {_summary_path(version, cache_dir)}")
+    return version
+
+def load_delay_summary(path=None, cache_dir=DELAY_CAUSE_CACHE_DIR):
+    """
+    Returns the precomputed page summary for the current data version ({'totals': dict,
+    name: DataFrame, ...}), building it first if the offline stage has not run.
+    Returns None when no delay-cause CSV is found.
+    """
+    version = ensure_delay_summary(path, cache_dir)
+    if version is None:
+        return None
+    with open(_summary_path(version, cache_dir)) as f:
+        stored = json.load(f)
+    summary = {'totals': stored['totals']}
+    for name, table in stored['tables'].items():
+        table = pd.DataFrame(table['data'], columns=table['columns'])
+        if 'timestamp' in table.columns:
+            table['timestamp'] = pd.to_datetime(table['timestamp'])
+        summary[name] = table
+    return summary
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import numpy as np
+from pathlib import Path
+
+from modeling import MODELS_DIR, TURBULENCE_FEATURES, turbulence_feature_frame
+from turbulence_store import TURBULENCE_STORE_DIR, STORE_SCHEMA_VERSION, load_manifest, read_turbulence
+
+# Model-ready matrix, versioned alongside the model it trains
+TURBULENCE_FEATURES_PATH = MODELS_DIR / "turbulence_features.npy"
+
+def _labels_path(path):
+    return path.with_name(path.stem + "_labels.npy")
+
+def _periods_path(path):
+    return path.with_name(path.stem + "_periods.npy")
+
+def store_version(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Short hash of the raw-file hashes in the store manifest and the store schema. Changes
+    whenever a source file is added, modified or removed or cleaning changes, and is None
+    for stores without a manifest.
+    """
+    manifest = load_manifest(store_dir)
+    if not manifest:
+        return None
+    digest = hashlib.sha256(f"schema:{STORE_SCHEMA_VERSION}\n".encode())
+    for source in sorted(manifest):
+        digest.update(f"{source}:{manifest[source]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+def materialize_turbulence_features(df, version=None, path=TURBULENCE_FEATURES_PATH):
+    """
+    Writes the TURBULENCE_FEATURES matrix as a contiguous float32 .npy and the encoded
+    labels as int8, with a JSON sidecar holding the version, feature order and classes.
+    Classes are sorted like LabelEncoder so codes match a freshly fitted encoder.
+    Rows are written in timestamp order so time-based splits can slice by position.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = df.sort_values('timestamp', kind='stable')
+    features = turbulence_feature_frame(df)
+
+    X = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(df), len(TURBULENCE_FEATURES)))
+    # Filled column by column so no float64 copy of the whole table is ever built
+    for i, name in enumerate(TURBULENCE_FEATURES):
+        X[:, i] = features[name].to_numpy(dtype=np.float32, na_value=np.nan)
+    X.flush()
+    del X
+
+    classes, codes = np.unique(df['turbulence_intensity'].astype(str).to_numpy(), return_inverse=True)
+    np.save(_labels_path(path), codes.astype(np.int8))
+    # YYYYMM of each row; non-decreasing, so a month boundary is a single searchsorted
+    np.save(_periods_path(path), (df['timestamp'].dt.year * 100 + df['timestamp'].dt.month).to_numpy(dtype=np.int32))
+
+    meta = {'version': version, 'order': 'timestamp', 'features': TURBULENCE_FEATURES,
+            'classes': classes.tolist(), 'n_rows': len(df)}
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"Saved {len(df):,} feature rows to {path}")
+    return meta
+
+def load_turbulence_features(path=TURBULENCE_FEATURES_PATH):
+    """
+    Memory-maps the feature matrix and labels.
+    Returns (X, y, meta), or (None, None, None) when no artifact exists.
+    """
+    path = Path(path)
+    if not path.exists() or not path.with_suffix('.json').exists():
+        return None, None, None
+    with open(path.with_suffix('.json')) as f:
+        meta = json.load(f)
+    X = np.load(path, mmap_mode='r')
+    y = np.load(_labels_path(path), mmap_mode='r')
+    return X, y, meta
+
+def load_turbulence_periods(path=TURBULENCE_FEATURES_PATH):
+    """
+    Memory-maps the YYYYMM period of each feature row, or returns None.
+    """
+    path = _periods_path(Path(path))
+    return np.load(path, mmap_mode='r') if path.exists() else None
+
+def ensure_turbulence_features(store_dir=TURBULENCE_STORE_DIR, path=TURBULENCE_FEATURES_PATH):
+    """
+    Returns the memory-mapped features, rebuilding them from the store first if the
+    artifact is missing or was built from a different store version.
+    """
+    version = store_version(store_dir)
+    X, y, meta = load_turbulence_features(path)
+    current = (meta is not None and version is not None and meta['version'] == version
+               and meta.get('order') == 'timestamp' and _periods_path(Path(path)).exists())
+    if current:
+        return X, y, meta
+
+    df = read_turbulence(columns=['timestamp', 'altitude', 'latitude', 'longitude', 'turbulence_intensity'],
+                         store_dir=store_dir)
+    if df.empty:
+        return None, None, None
+    materialize_turbulence_features(df, version=version, path=path)
+    del df
+    return load_turbulence_features(path)
@@ -0,0 +1,149 @@
+import json
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from compact_model import export_compact_model, month_kernel
+from modeling import MODELS_DIR, TURBULENCE_FEATURES, engine_stats, turbulence_feature_frame, label_encoder_from_classes
+from turbulence_store import (
+    TURBULENCE_STORE_DIR, TURBULENCE_LABELS, read_turbulence, list_partitions, partition_fingerprint
+)
+
+TURBULENCE_MODEL_PATH = MODELS_DIR / "turbulence_model.pkl"
+
+class PartitionedForestClassifier:
+    """
+    Ensemble of small random forests, one per (year, month) partition of the turbulence store.
+    Each member is trained on its own month only, so training never needs more than one
+    partition in memory, and adding or re-ingesting a month retrains just that member.
+    Month is constant inside a member, so seasonality comes from the mixture instead:
+    members are weighted by their training rows times a Gaussian of the circular distance
+    between their month and the query month (month_bandwidth months wide).
+    Exposes classes_ / predict_proba / predict like a scikit-learn classifier, so it drops
+    into predict_turbulence_batch and build_risk_grid unchanged.
+    """
+
+    def __init__(self, n_classes, trees_per_partition=10, max_depth=10, random_state=42, month_bandwidth=1.0):
+        self.classes_ = np.arange(n_classes)
+        self.trees_per_partition = trees_per_partition
+        self.max_depth = max_depth
+        self.random_state = random_state
+        self.month_bandwidth = month_bandwidth
+        self.members = {}
+
+    def fit_partition(self, key, X, y, fingerprint=None):
+        """
+        Trains (or replaces) the member for one partition.
+        """
+        forest = RandomForestClassifier(n_estimators=self.trees_per_partition, max_depth=self.max_depth,
+                                        random_state=self.random_state, n_jobs=-1)
+        forest.fit(X, y)
+        self.members[key] = {'model': forest, 'n_rows': len(y), 'fingerprint': fingerprint}
+
+    def member_weights(self, X):
+        """
+        Returns (n_rows, n_members) mixture weights, each row summing to one.
+        """
+        if isinstance(X, pd.DataFrame):
+            months = X['month'].to_numpy(dtype=np.float64)
+        else:
+            months = np.asarray(X, dtype=np.float64)[:, TURBULENCE_FEATURES.index('month')]
+        member_months = [key[1] for key in self.members]
+        n_rows = np.array([member['n_rows'] for member in self.members.values()], dtype=np.float64)
+        weights = n_rows * month_kernel(months, member_months, self.month_bandwidth)
+        return weights / weights.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X):
+        # A month missing a class contributes zero for it
+        proba = np.zeros((len(X), len(self.classes_)))
+        if not self.members:
+            return proba
+        weights = self.member_weights(X)
+        for i, member in enumerate(self.members.values()):
+            forest = member['model']
+            proba[:, forest.classes_] += forest.predict_proba(X) * weights[:, i:i + 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def _read_partition(year, month, store_dir, le):
+    df = read_turbulence(columns=['timestamp', 'altitude', 'latitude', 'longitude', 'turbulence_intensity'],
+                         filters=[('year', '==', year), ('month', '==', month)], store_dir=store_dir)
+    df = df[df['turbulence_intensity'].astype(str).isin(le.classes_)]
+    return turbulence_feature_frame(df).astype('float32'), le.transform(df['turbulence_intensity'].astype(str))
+
+def train_turbulence_incremental(store_dir=TURBULENCE_STORE_DIR, model_path=TURBULENCE_MODEL_PATH,
+                                 trees_per_partition=10, max_depth=10, full_retrain=False):
+    """
+    Streams the store one month partition at a time into a PartitionedForestClassifier.
+    An existing partitioned model is updated in place: only new or changed months are
+    trained and months removed from the store are dropped. Before a new month is added
+    the current ensemble is scored on it, giving a forward-looking accuracy per month.
+    Saves the .pkl, .npz and .json sidecar next to model_path, as fit_pirep_classifier does.
+    """
+    model_path = Path(model_path)
+    classes = sorted(TURBULENCE_LABELS)
+    le = label_encoder_from_classes(classes)
+
+    model = None
+    if model_path.exists() and not full_retrain:
+        model = joblib.load(model_path)
+        # A model from a full fit is replaced rather than mixed with partition members
+        if not isinstance(model, PartitionedForestClassifier):
+            model = None
+    if model is None:
+        model = PartitionedForestClassifier(len(classes), trees_per_partition, max_depth)
+
+    partitions = list_partitions(store_dir)
+    removed = set(model.members) - set(partitions)
+    for key in removed:
+        print(f"Dropping member for {key[0]}-{key[1]:02d} (partition removed)")
+        del model.members[key]
+
+    n_trained = 0
+    X_sample = None
+    start = time.perf_counter()
+    for year, month in partitions:
+        fingerprint = partition_fingerprint(year, month, store_dir)
+        member = model.members.get((year, month))
+        if member is not None and member['fingerprint'] == fingerprint:
+            continue
+
+        X, y = _read_partition(year, month, store_dir, le)
+        if not len(y):
+            continue
+
+        if model.members and (year, month) not in model.members:
+            print(f"{year}-{month:02d}: forward accuracy {accuracy_score(y, model.predict(X)):.3f} on {len(y):,} rows")
+        model.fit_partition((year, month), X, y, fingerprint)
+        n_trained += 1
+        X_sample = X[:10_000]
+        del X, y
+    fit_seconds = time.perf_counter() - start
+
+    if n_trained or removed:
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, model_path)
+        joblib.dump(le, model_path.parent / "turbulence_le.pkl")
+        export_compact_model(model, model_path.with_suffix('.npz'), label_names=le.classes_)
+        # Replaces the sidecar of any earlier full fit, which would otherwise describe another model
+        stats = {}
+        if model.members:
+            if X_sample is None:
+                X_sample = _read_partition(*max(model.members), store_dir, le)[0][:10_000]
+            stats = engine_stats(model, model_path, fit_seconds, X_sample)
+        with open(model_path.with_suffix('.json'), 'w') as f:
+            json.dump({'features': TURBULENCE_FEATURES, 'feature_version': None, 'engine': 'partitioned_forest',
+                       'params': {'trees_per_partition': model.trees_per_partition, 'max_depth': model.max_depth,
+                                  'month_bandwidth': model.month_bandwidth},
+                       'partitions': len(model.members),
+                       'rows': int(sum(member['n_rows'] for member in model.members.values())), **stats}, f, indent=2)
+        print(f"Trained {n_trained} partition(s); {len(model.members)} in model. Saved to {model_path}")
+    else:
+        print("Turbulence model is up to date with the store.")
+    return model
@@ -1,73 +1,222 @@
 
+import json
+import time
 import pandas as pd
 import numpy as np
 import joblib
 from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+from sklearn.ensemble import (
+    RandomForestClassifier, GradientBoostingRegressor, HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
 from sklearn.metrics import classification_report, mean_squared_error, r2_score
 from sklearn.preprocessing import LabelEncoder
 
-MODELS_DIR = Path("aviation-analytics/models")
+from compact_model import export_compact_model
+from scoring import MODELS_DIR, TURBULENCE_FEATURES
+
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
-def train_turbulence_model(df):
+# Model engines by name. The first entry of each is the original estimator and the default.
+# Histogram boosting bins features once and trains multi-threaded, so it scales better with rows.
+TURBULENCE_ENGINES = {
+    # Using smaller n_estimators for speed in this demo, can increase later
+    'random_forest': lambda: RandomForestClassifier(n_estimators=50, max_depth=10, random_state=42, n_jobs=-1),
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1,
+                                                                     early_stopping=True, random_state=42),
+}
+
+# Icing is predicted from the same inputs with the same classifiers
+ICING_ENGINES = TURBULENCE_ENGINES
+
+AEI_ENGINES = {
+    'gradient_boosting': lambda: GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42),
+    'hist_gradient_boosting': lambda: HistGradientBoostingRegressor(max_iter=100, max_depth=5, random_state=42),
+}
+
+# Best engine and hyperparameters per model, written by tuning.py
+TUNED_PARAMS_PATH = MODELS_DIR / "tuned_params.json"
+
+def make_estimator(engines, engine=None, params=None):
     """
-    Trains a Random Forest classifier to predict turbulence intensity.
+    Builds a fresh estimator for an engine name; None selects the default (first) engine.
+    params override the engine's default hyperparameters.
+    """
+    engine = engine or next(iter(engines))
+    if engine not in engines:
+        raise ValueError(f"Unknown engine '{engine}'. Choose from: {', '.join(engines)}")
+    estimator = engines[engine]()
+    if params:
+        estimator.set_params(**params)
+    return engine, estimator
+
+def load_tuned_config(task, path=TUNED_PARAMS_PATH):
+    """
+    Returns (engine, params) chosen by tuning.py for 'turbulence', 'icing' or 'aei', or (None, None).
+    """
+    path = Path(path)
+    if not path.exists():
+        return None, None
+    with open(path) as f:
+        config = json.load(f).get(task)
+    if not config:
+        return None, None
+    return config['engine'], config['params']
+
+def engine_stats(model, path, fit_seconds, X_sample, repeats=20):
+    """
+    Fit time, size on disk and predict latency (single row and per row in one batch) of a saved model.
+    """
+    single = X_sample[:1]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(single)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict(X_sample)
+    batch_seconds = time.perf_counter() - start
+
+    stats = {
+        'fit_seconds': round(fit_seconds, 3),
+        'model_bytes': Path(path).stat().st_size,
+        'predict_single_ms': round(float(np.median(timings)) * 1000, 3),
+        'predict_batch_us_per_row': round(batch_seconds / max(len(X_sample), 1) * 1e6, 3),
+    }
+    print(f"Fit {stats['fit_seconds']}s | size {stats['model_bytes'] / 1024:.0f} KB | "
+          f"predict {stats['predict_single_ms']} ms/row single, {stats['predict_batch_us_per_row']} us/row batched")
+    return stats
+
+def turbulence_feature_frame(df):
+    """
+    Returns the TURBULENCE_FEATURES columns for a report table, deriving month and hour
+    from the timestamp when they are missing. The input DataFrame is not modified.
+    """
+    if 'month' not in df.columns or 'hour' not in df.columns:
+        df = df.assign(month=df['timestamp'].dt.month, hour=df['timestamp'].dt.hour)
+    return df[TURBULENCE_FEATURES]
+
+def label_encoder_from_classes(classes):
+    """
+    Rebuilds a fitted LabelEncoder from its stored class list.
+    """
+    le = LabelEncoder()
+    le.classes_ = np.asarray(classes, dtype=object)
+    return le
+
+def train_turbulence_model(df, engine=None, params=None):
+    """
+    Trains a classifier to predict turbulence intensity from a report table.
+    Args:
+        engine (str): Key of TURBULENCE_ENGINES; defaults to the random forest.
+        params (dict): Hyperparameter overrides, e.g. from load_tuned_config('turbulence').
     """
-    print("Training Turbulence Model...")
-    
     # Features: Altitude, Latitude, Longitude, Month, Hour
     # Target: turbulence_intensity
-    
-    # Feature Engineering
-    df['month'] = df['timestamp'].dt.month
-    df['hour'] = df['timestamp'].dt.hour
-    
-    features = ['altitude', 'latitude', 'longitude', 'month', 'hour']
-    target = 'turbulence_intensity'
-    
-    X = df[features]
-    y = df[target].astype(str)
+    X = turbulence_feature_frame(df)
+    y = df['turbulence_intensity'].astype(str)
     
     # Encode Target
     le = LabelEncoder()
     y_encoded = le.fit_transform(y)
     
+    return fit_turbulence_model(X, y_encoded, le, engine=engine, params=params)
+
+def fit_turbulence_model(X, y_encoded, le, feature_version=None, engine=None, params=None):
+    """
+    Fits and saves the turbulence classifier on an already encoded feature matrix.
+    Args:
+        X: DataFrame or (N, 5) array of TURBULENCE_FEATURES, e.g. the memory-mapped feature store.
+        y_encoded: Integer labels produced by le.
+        feature_version (str): Version of the feature artifact, recorded next to the model.
+        engine (str): Key of TURBULENCE_ENGINES; defaults to the random forest.
+        params (dict): Hyperparameter overrides, e.g. from load_tuned_config('turbulence').
+    """
+    return fit_pirep_classifier('turbulence', TURBULENCE_ENGINES, X, y_encoded, le,
+                                feature_version=feature_version, engine=engine, params=params)
+
+def fit_pirep_classifier(name, engines, X, y_encoded, le, feature_version=None, engine=None, params=None):
+    """
+    Fits a PIREP intensity classifier on TURBULENCE_FEATURES and saves it as
+    {name}_model.pkl, {name}_le.pkl, {name}_model.npz and {name}_model.json.
+    """
+    engine, clf = make_estimator(engines, engine, params)
+    title = name.capitalize()
+    print(f"Training {title} Model ({engine})...")
+    
+    # Arrays are wrapped without copying so the model keeps feature names for DataFrame scoring
+    if not isinstance(X, pd.DataFrame):
+        X = pd.DataFrame(X, columns=TURBULENCE_FEATURES, copy=False)
+    
     # Split
     X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42)
     
     # Train
-    # Using smaller n_estimators for speed in this demo, can increase later
-    clf = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=42, n_jobs=-1)
+    start = time.perf_counter()
     clf.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
     
     # Evaluate
     y_pred = clf.predict(X_test)
-    print("Turbulence Model Report:")
-    print(classification_report(y_test, y_pred, target_names=le.classes_))
+    print(f"{title} Model Report:")
+    print(classification_report(y_test, y_pred, labels=np.arange(len(le.classes_)), target_names=le.classes_))
     
     # Save
-    joblib.dump(clf, MODELS_DIR / "turbulence_model.pkl")
-    joblib.dump(le, MODELS_DIR / "turbulence_le.pkl")
-    print(f"Saved turbulence model to {MODELS_DIR}")
+    joblib.dump(clf, MODELS_DIR / f"{name}_model.pkl")
+    joblib.dump(le, MODELS_DIR / f"{name}_le.pkl")
+    export_compact_model(clf, MODELS_DIR / f"{name}_model.npz", label_names=le.classes_)
+    stats = engine_stats(clf, MODELS_DIR / f"{name}_model.pkl", fit_seconds, X_test)
+    with open(MODELS_DIR / f"{name}_model.json", 'w') as f:
+        json.dump({'features': TURBULENCE_FEATURES, 'feature_version': feature_version, 'engine': engine,
+                   'params': params or {}, **stats}, f, indent=2)
+    print(f"Saved {name} model to {MODELS_DIR}")
     
     return clf
 
-def train_aei_model(df):
+def train_icing_model(df, engine=None, params=None):
     """
-    Trains a Gradient Boosting Regressor to predict Airport Efficiency (Avg Delay).
+    Trains a classifier predicting icing intensity from the turbulence model's features.
+    Args:
+        df: Icing reports, e.g. turbulence_store.read_icing().
+        engine (str): Key of ICING_ENGINES; defaults to the random forest.
+        params (dict): Hyperparameter overrides, e.g. from load_tuned_config('icing').
+    Returns (model, label_encoder).
+    """
+    X = turbulence_feature_frame(df)
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(df['icing_intensity'].astype(str))
+    clf = fit_pirep_classifier('icing', ICING_ENGINES, X, y_encoded, le, engine=engine, params=params)
+    return clf, le
+
+def aei_feature_columns(df):
+    """
+    Model inputs for the AEI regressor available in df.
     """
-    print("Training AEI Model...")
-    
-    # Features: Month, Total Flights, Cancellation Rate (Lagged? No, just concurrent for now or purely based on time/volume)
-    # Let's try to predict avg_dep_delay based on volume and month
-    
     features = ['total_flights', 'cancellation_rate'] 
     # Note: cancellation_rate is highly correlated but might be unknown ahead of time. 
     # For prediction, maybe we only use 'month' and 'total_flights' (projected).
     # Let's keep it simple.
     
+    # Airport-month rows from the AEI cube carry the calendar month as a seasonal feature
+    if 'month' in df.columns:
+        features.append('month')
+    return features
+
+def train_aei_model(df, engine=None, params=None):
+    """
+    Trains a Gradient Boosting Regressor to predict Airport Efficiency (Avg Delay).
+    Args:
+        engine (str): Key of AEI_ENGINES; defaults to the exact-split gradient boosting.
+        params (dict): Hyperparameter overrides, e.g. from load_tuned_config('aei').
+    """
+    engine, reg = make_estimator(AEI_ENGINES, engine, params)
+    print(f"Training AEI Model ({engine})...")
+    
+    # Features: Month, Total Flights, Cancellation Rate (Lagged? No, just concurrent for now or purely based on time/volume)
+    # Let's try to predict avg_dep_delay based on volume and month
+    features = aei_feature_columns(df)
+    
     target = 'avg_dep_delay'
     
     # Ensure no NaNs
@@ -78,8 +227,9 @@ def train_aei_model(df):
     
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    reg = GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42)
+    start = time.perf_counter()
     reg.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
     
     y_pred = reg.predict(X_test)
     mse = mean_squared_error(y_test, y_pred)
@@ -88,6 +238,11 @@ def train_aei_model(df):
     print(f"AEI Model MSE: {mse:.2f}, R2: {r2:.2f}")
     
     joblib.dump(reg, MODELS_DIR / "aei_model.pkl")
+    export_compact_model(reg, MODELS_DIR / "aei_model.npz")
+    stats = engine_stats(reg, MODELS_DIR / "aei_model.pkl", fit_seconds, X_test)
+    with open(MODELS_DIR / "aei_model.json", 'w') as f:
+        json.dump({'features': features, 'engine': engine, 'params': params or {}, 'mse': mse, 'r2': r2, **stats},
+                  f, indent=2)
     print(f"Saved AEI model to {MODELS_DIR}")
     
     return reg
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrent.futures import ProcessPoolExecutor
+
+# RE2 patterns run by pyarrow over the whole column in C++, with no Python per row.
+# Each field group (/TP, /FL, ...) is located once; /TB qualifiers are then matched
+# against the short /TB text instead of the full report.
+REPORT_PATTERNS = {
+    'aircraft': r'/TP\s*(?P<aircraft>[A-Z0-9]{2,4})\b',
+    'flight_level': r'/FL\s*(?P<low>\d{3})(?:\s*-\s*(?P<high>\d{3}))?',
+    # Intensity ranges such as "LGT/MOD CHOP" contain a slash, other groups start one
+    'turbulence': r'/TB\s*(?P<text>[^/]*(?:/(?:LGT|MOD|SEV|CHOP|CAT)[^/]*)*)',
+    'temperature': r'/TA\s*(?P<sign>[M+-]?)\s*(?P<degrees>\d{1,2})\b',
+    'wind': r'/WV\s*(?P<direction>\d{3})(?P<speed>\d{2,3})',
+}
+
+TURBULENCE_TEXT_PATTERNS = {
+    'frequency': r'\b(?P<frequency>OCNL|OCC|INTMT|INTM|CONS|CONT)',
+    'type': r'\b(?P<type>CHOP|CAT|LLWS|MWAVE)\b',
+    'range': r'\b(?:FL)?(?P<low>\d{3})\s*-\s*(?:FL)?(?P<high>\d{3})\b',
+}
+
+# Keyed by the first two letters of the frequency qualifier
+TURBULENCE_FREQUENCIES = {'OC': 'Occasional', 'IN': 'Intermittent', 'CO': 'Continuous'}
+
+REPORT_FEATURES = [
+    'aircraft_type', 'turbulence_frequency', 'turbulence_type',
+    'turbulence_base', 'turbulence_top', 'temperature_c', 'wind_direction', 'wind_speed_kt',
+]
+
+def _extract(strings, pattern):
+    """
+    Runs one RE2 pattern and returns {group: string array}, null where the pattern or an
+    optional group did not match.
+    """
+    matches = pc.extract_regex(strings, pattern)
+    groups = {}
+    for i in range(matches.type.num_fields):
+        group = matches.field(i)
+        matched = pc.and_(matches.is_valid(), pc.greater(pc.utf8_length(group), 0))
+        groups[matches.type.field(i).name] = pc.if_else(matched, group, pa.scalar(None, pa.string()))
+    return groups
+
+def normalize_reports(reports):
+    """
+    Canonical form of REPORT strings for duplicate detection: upper case, no whitespace
+    and no trailing ':', '.', ')' or '"'. Re-sent reports differ only in these, e.g.
+    "... /RM ZFW AWC-WEB:" and "... /RM ZFW AWC-WEB", or "/RM(AKFSS)" and "/RM (AKFSS".
+    """
+    strings = pc.replace_substring_regex(pc.utf8_upper(_to_arrow(reports)), r'\s+', '')
+    strings = pc.utf8_rtrim(strings, ':.)"')
+    return pd.Series(strings.to_numpy(zero_copy_only=False), index=reports.index)
+
+def _to_float(strings):
+    return pc.cast(strings, pa.float64()).to_numpy(zero_copy_only=False)
+
+def _parse_strings(strings):
+    """
+    Parses an Arrow string array of reports into an Arrow table of REPORT_FEATURES.
+    """
+    fields = {name: _extract(strings, pattern) for name, pattern in REPORT_PATTERNS.items()}
+    turbulence_text = fields['turbulence']['text']
+    qualifiers = {name: _extract(turbulence_text, pattern) for name, pattern in TURBULENCE_TEXT_PATTERNS.items()}
+
+    aircraft = fields['aircraft']['aircraft']
+    aircraft = pc.if_else(pc.equal(aircraft, 'UNKN'), pa.scalar(None, pa.string()), aircraft)
+
+    prefix = pc.utf8_slice_codeunits(qualifiers['frequency']['frequency'], 0, 2)
+    keys = pa.array(list(TURBULENCE_FREQUENCIES))
+    frequency = pc.take(pa.array(list(TURBULENCE_FREQUENCIES.values())), pc.index_in(prefix, keys))
+
+    # A /TB range is more specific than the report altitude; /FL ranges cover the rest
+    base = _to_float(pc.coalesce(qualifiers['range']['low'], fields['flight_level']['low']))
+    top = _to_float(pc.coalesce(qualifiers['range']['high'], fields['flight_level']['high'],
+                                fields['flight_level']['low']))
+    base, top = np.fmin(base, top) * 100, np.fmax(base, top) * 100
+
+    degrees = _to_float(fields['temperature']['degrees'])
+    negative = pc.is_in(fields['temperature']['sign'], pa.array(['M', '-'])).to_numpy(zero_copy_only=False)
+    temperature = np.where(negative, -degrees, degrees)
+
+    direction = _to_float(fields['wind']['direction'])
+    speed = _to_float(fields['wind']['speed'])
+    # 000 is calm; anything past 360 is a garbled group
+    invalid_wind = direction > 360
+    direction[invalid_wind] = np.nan
+    speed[invalid_wind] = np.nan
+
+    return pa.table({
+        'aircraft_type': aircraft,
+        'turbulence_frequency': frequency,
+        'turbulence_type': qualifiers['type']['type'],
+        'turbulence_base': base,
+        'turbulence_top': top,
+        'temperature_c': temperature,
+        'wind_direction': direction,
+        'wind_speed_kt': speed,
+    })
+
+def _to_arrow(reports):
+    return pa.array(reports.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+
+def parse_reports(reports):
+    """
+    Extracts structured fields from a Series of raw PIREP REPORT strings.
+    Returns a DataFrame on the same index with:
+        aircraft_type          /TP designator (e.g. 'B737'); UNKN is missing
+        turbulence_frequency   'Occasional', 'Intermittent' or 'Continuous' (OCNL/INTMT/CONS)
+        turbulence_type        CHOP, CAT, LLWS or MWAVE
+        turbulence_base/top    altitude range in feet, from the /TB text (e.g. "MOD 290-360")
+                               or a /FL range (e.g. FL270-310); the report altitude otherwise
+        temperature_c          /TA outside air temperature, M prefix meaning negative
+        wind_direction         /WV direction in degrees
+        wind_speed_kt          /WV speed in knots
+    """
+    parsed = _parse_strings(_to_arrow(reports)).to_pandas()
+    parsed.index = reports.index
+    return parsed
+
+def parse_reports_parallel(reports, max_workers=None, chunk_size=250_000):
+    """
+    parse_reports over a process pool, one chunk of chunk_size reports per task.
+    Chunks travel as Arrow buffers, which pickle far faster than object Series.
+    Worth it for millions of reports held in memory; ingestion already parses
+    inside the per-file workers of iter_pirep_partitions.
+    """
+    if len(reports) <= chunk_size:
+        return parse_reports(reports)
+    strings = _to_arrow(reports)
+    chunks = [strings.slice(i, chunk_size) for i in range(0, len(strings), chunk_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        parsed = pa.concat_tables(pool.map(_parse_strings, chunks)).to_pandas()
+    parsed.index = reports.index
+    return parsed
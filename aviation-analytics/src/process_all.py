@@ -1,4 +1,3 @@
-
 import os
 import sys
 from pathlib import Path
@@ -8,41 +7,71 @@ warnings.filterwarnings('ignore')
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 
-from data_preprocessing import process_turbulence_data, process_aei_chunks
+from data_preprocessing import process_turbulence_data_streaming, process_aei_chunks
+from turbulence_store import TURBULENCE_STORE_DIR, ICING_STORE_DIR
+from turbulence_utils import TURBULENCE_CUBE_PATH, ensure_filter_cube
+from feature_store import TURBULENCE_FEATURES_PATH, ensure_turbulence_features
+from delay_causes import ensure_delay_summary
 
 # Define Paths
 RAW_DIR = Path("aviation-analytics/data/raw")
 PROCESSED_DIR = Path("aviation-analytics/data/processed")
 PIREPS_DIR = RAW_DIR / "pireps"
 
-# Create directories if not exist
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
-# 1. Turbulence
-print("Processing Turbulence Data...")
-turbulence_df = process_turbulence_data(PIREPS_DIR)
-
-if not turbulence_df.empty:
-    print(f"Processed {len(turbulence_df)} rows.")
-    output_path = PROCESSED_DIR / "turbulence_cleaned.csv.gz"
-    turbulence_df.to_csv(output_path, compression='gzip', index=False)
-    print(f"Saved to {output_path}")
-else:
-    print("No valid turbulence data found.")
-
-# 2. AEI
-print("\nStarting AEI Processing (Chunked Download)...")
-YEARS = [2023, 2024]
-MONTHS = range(1, 13)
-
-aei_df = process_aei_chunks(YEARS, MONTHS)
-
-if not aei_df.empty:
-    print(f"Processed AEI for {len(aei_df)} airports.")
-    print(aei_df.head())
-    
-    output_path = PROCESSED_DIR / "airport_efficiency.csv.gz"
-    aei_df.to_csv(output_path, compression='gzip', index=False)
-    print(f"Saved AEI data to {output_path}")
-else:
-    print("Failed to process AEI data.")
+# Number of PIREP files parsed concurrently (bounds peak memory)
+MAX_IN_FLIGHT_FILES = 4
+
+# Only new or changed raw files are cleaned unless --full-refresh is passed
+FULL_REFRESH = "--full-refresh" in sys.argv
+
+def main():
+    # Create directories if not exist
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 1. Turbulence (icing reports are stored from the same pass)
+    print("Processing Turbulence and Icing Data...")
+    n_rows = process_turbulence_data_streaming(PIREPS_DIR, TURBULENCE_STORE_DIR, max_in_flight=MAX_IN_FLIGHT_FILES,
+                                               full_refresh=FULL_REFRESH)
+
+    if n_rows:
+        print(f"Processed {n_rows} rows.")
+        print(f"Saved to {TURBULENCE_STORE_DIR} and {ICING_STORE_DIR}")
+    else:
+        print("No new turbulence data found.")
+
+    # Dashboard filter cube: sum of the per-file fragments written during ingestion
+    if ensure_filter_cube():
+        print(f"Saved turbulence filter cube to {TURBULENCE_CUBE_PATH}")
+
+    # Model-ready feature matrix for train_models.py (skipped when the store is unchanged)
+    if ensure_turbulence_features()[2] is not None:
+        print(f"Turbulence features ready at {TURBULENCE_FEATURES_PATH}")
+
+    # 2. AEI
+    print("\nStarting AEI Processing (Chunked Download)...")
+    YEARS = [2023, 2024]
+    MONTHS = range(1, 13)
+
+    aei_df = process_aei_chunks(YEARS, MONTHS)
+
+    if not aei_df.empty:
+        print(f"Processed AEI for {len(aei_df)} airports.")
+        print(aei_df.head())
+
+        output_path = PROCESSED_DIR / "airport_efficiency.csv.gz"
+        aei_df.to_csv(output_path, compression='gzip', index=False)
+        print(f"Saved AEI data to {output_path}")
+    else:
+        print("Failed to process AEI data.")
+
+    # 3. Airline delay causes: page rollups for the current file version (skipped when unchanged)
+    print("\nSummarizing Airline Delay Causes...")
+    version = ensure_delay_summary()
+    if version:
+        print(f"Delay-cause summary ready for version {version}")
+    else:
+        print("Airline_Delay_Cause.csv not found.")
+
+# Worker processes re-import this module on spawn-based platforms, so the pipeline must not run at import
+if __name__ == "__main__":
+    main()
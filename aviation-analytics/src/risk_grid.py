@@ -0,0 +1,124 @@
+import json
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from scoring import MODELS_DIR, TURBULENCE_FEATURES, RISK_WEIGHTS
+
+RISK_GRID_PATH = MODELS_DIR / "turbulence_risk_grid.npy"
+ICING_RISK_GRID_PATH = MODELS_DIR / "icing_risk_grid.npy"
+
+# Lattice axes as (start, stop, step); stop is inclusive. Defaults cover CONUS.
+DEFAULT_AXES = {
+    'latitude': (20.0, 55.0, 1.0),
+    'longitude': (-130.0, -65.0, 1.0),
+    'altitude': (0.0, 45000.0, 3000.0),
+    'month': (1, 12, 1),
+    'hour': (0, 21, 3),
+}
+
+AXIS_ORDER = ['latitude', 'longitude', 'altitude', 'month', 'hour']
+
+def _axis_values(start, stop, step):
+    return np.arange(start, stop + step / 2, step)
+
+def build_risk_grid(model, le, path=RISK_GRID_PATH, axes=DEFAULT_AXES):
+    """
+    Evaluates a turbulence (or icing) model over a lat/lon/altitude/month/hour lattice and writes the
+    class probabilities to a memory-mappable float16 .npy of shape (lat, lon, alt, month, hour, class).
+    Axis definitions and class names are stored in a JSON sidecar next to the array.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    values = {name: _axis_values(*axes[name]) for name in AXIS_ORDER}
+    classes = list(le.inverse_transform(model.classes_))
+    shape = tuple(len(values[name]) for name in AXIS_ORDER) + (len(classes),)
+    print(f"Building risk grid {shape} ({np.prod(shape[:-1]):,} cells)...")
+
+    grid = np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=shape)
+
+    # One spatial slab (every lat/lon/alt) is scored per month/hour pair
+    lat, lon, alt = np.meshgrid(values['latitude'], values['longitude'], values['altitude'], indexing='ij')
+    slab = pd.DataFrame({'altitude': alt.ravel(), 'latitude': lat.ravel(), 'longitude': lon.ravel()})
+    for m_idx, month in enumerate(values['month']):
+        for h_idx, hour in enumerate(values['hour']):
+            slab['month'] = month
+            slab['hour'] = hour
+            proba = model.predict_proba(slab[TURBULENCE_FEATURES])
+            grid[:, :, :, m_idx, h_idx, :] = proba.reshape(shape[:3] + (len(classes),))
+    grid.flush()
+    del grid
+
+    meta = {'axes': {name: list(axes[name]) for name in AXIS_ORDER}, 'classes': classes}
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"Saved risk grid to {path}")
+
+class TurbulenceRiskGrid:
+    """
+    Memory-mapped view of a precomputed risk grid with O(1) nearest-cell lookups.
+    """
+
+    def __init__(self, path=RISK_GRID_PATH):
+        path = Path(path)
+        with open(path.with_suffix('.json')) as f:
+            meta = json.load(f)
+        self.grid = np.load(path, mmap_mode='r')
+        self.classes = meta['classes']
+        self.axes = {name: tuple(meta['axes'][name]) for name in AXIS_ORDER}
+        self.values = {name: _axis_values(*self.axes[name]) for name in AXIS_ORDER}
+        self.weights = np.array([RISK_WEIGHTS.get(c, 0.0) for c in self.classes], dtype=np.float32)
+
+    def _index(self, name, value):
+        start, _, step = self.axes[name]
+        size = len(self.values[name])
+        if np.ndim(value) == 0:
+            # Scalar fast path avoids array allocation for single-point lookups
+            idx = round((value - start) / step)
+            return idx % size if name == 'hour' else min(max(idx, 0), size - 1)
+        idx = np.rint((np.asarray(value, dtype=np.float64) - start) / step).astype(np.int64)
+        if name == 'hour':
+            # Hours wrap around midnight
+            return idx % size
+        return np.clip(idx, 0, size - 1)
+
+    def lookup(self, altitude, latitude, longitude, month, hour):
+        """
+        Class probabilities of the nearest cell. Accepts scalars or equal-length arrays.
+        Returns an array of shape (..., n_classes) in the order of self.classes.
+        """
+        return np.asarray(self.grid[
+            self._index('latitude', latitude),
+            self._index('longitude', longitude),
+            self._index('altitude', altitude),
+            self._index('month', month),
+            self._index('hour', hour),
+        ], dtype=np.float32)
+
+    def risk_score(self, altitude, latitude, longitude, month, hour):
+        """
+        Severity-weighted risk (same weights as scoring.RISK_WEIGHTS) of the nearest cell.
+        """
+        return self.lookup(altitude, latitude, longitude, month, hour) @ self.weights
+
+    def risk_map(self, altitude, month, hour):
+        """
+        Returns a DataFrame of latitude, longitude and risk_score for one flight level and time.
+        """
+        plane = np.asarray(self.grid[:, :, self._index('altitude', altitude),
+                                     self._index('month', month), self._index('hour', hour)], dtype=np.float32)
+        lat, lon = np.meshgrid(self.values['latitude'], self.values['longitude'], indexing='ij')
+        return pd.DataFrame({
+            'latitude': lat.ravel(),
+            'longitude': lon.ravel(),
+            'risk_score': (plane @ self.weights).ravel(),
+        })
+
+if __name__ == "__main__":
+    for name, grid_path in [('turbulence', RISK_GRID_PATH), ('icing', ICING_RISK_GRID_PATH)]:
+        model_path = MODELS_DIR / f"{name}_model.pkl"
+        if model_path.exists():
+            build_risk_grid(joblib.load(model_path), joblib.load(MODELS_DIR / f"{name}_le.pkl"), grid_path)
+        else:
+            print(f"{name.capitalize()} model not found at {model_path}")
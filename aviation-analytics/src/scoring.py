@@ -0,0 +1,86 @@
+import pandas as pd
+from pathlib import Path
+
+from compact_model import CompactModel
+
+# Scoring helpers shared by the pages and modeling.py. Nothing here imports scikit-learn,
+# so the prediction pages can start from the compact models alone.
+
+MODELS_DIR = Path("aviation-analytics/models")
+
+TURBULENCE_FEATURES = ['altitude', 'latitude', 'longitude', 'month', 'hour']
+
+# Weights used to collapse class probabilities into a single 0-1 risk score
+RISK_WEIGHTS = {'Severe': 1.0, 'Moderate': 0.5}
+
+def _is_current(compact_path, pickle_path):
+    # A pickle retrained after the last export must not be shadowed by a stale compact model
+    return compact_path.exists() and (not pickle_path.exists()
+                                      or compact_path.stat().st_mtime >= pickle_path.stat().st_mtime)
+
+def load_classifier(name, models_dir=MODELS_DIR):
+    """
+    Returns (model, label_encoder) for a PIREP classifier saved as {name}_model.*,
+    preferring the compact .npz export over the pickles. Returns (None, None) when
+    no trained model exists.
+    """
+    models_dir = Path(models_dir)
+    compact_path = models_dir / f"{name}_model.npz"
+    pickle_path = models_dir / f"{name}_model.pkl"
+    if _is_current(compact_path, pickle_path):
+        model = CompactModel(compact_path)
+        if model.label_encoder is not None:
+            return model, model.label_encoder
+
+    le_path = models_dir / f"{name}_le.pkl"
+    if pickle_path.exists() and le_path.exists():
+        import joblib
+        return joblib.load(pickle_path), joblib.load(le_path)
+    return None, None
+
+def load_turbulence_model(models_dir=MODELS_DIR):
+    """
+    Returns (model, label_encoder) of the turbulence classifier, or (None, None).
+    """
+    return load_classifier('turbulence', models_dir)
+
+def load_icing_model(models_dir=MODELS_DIR):
+    """
+    Returns (model, label_encoder) of the icing classifier, or (None, None).
+    """
+    return load_classifier('icing', models_dir)
+
+def load_aei_model(models_dir=MODELS_DIR):
+    """
+    Returns the AEI regressor, preferring the compact .npz export over the pickle, or None.
+    """
+    models_dir = Path(models_dir)
+    compact_path = models_dir / "aei_model.npz"
+    pickle_path = models_dir / "aei_model.pkl"
+    if _is_current(compact_path, pickle_path):
+        return CompactModel(compact_path)
+    if pickle_path.exists():
+        import joblib
+        return joblib.load(pickle_path)
+    return None
+
+def predict_turbulence_batch(model, le, rows):
+    """
+    Scores many (altitude, latitude, longitude, month, hour) rows with a single predict_proba call.
+    Works for the icing classifier too, which shares the features and label scale.
+    Labels are taken from the arg-max probability, which is what predict() does internally,
+    so callers do not need a second pass over the forest.
+    Args:
+        rows: DataFrame with TURBULENCE_FEATURES columns, or an (N, 5) array in that order.
+    Returns a DataFrame with one probability column per class, 'label' and 'risk_score'.
+    """
+    if isinstance(rows, pd.DataFrame):
+        X = rows[TURBULENCE_FEATURES]
+    else:
+        X = pd.DataFrame(rows, columns=TURBULENCE_FEATURES)
+    proba = model.predict_proba(X)
+
+    result = pd.DataFrame(proba, columns=le.inverse_transform(model.classes_), index=X.index)
+    result['label'] = le.inverse_transform(model.classes_[proba.argmax(axis=1)])
+    result['risk_score'] = sum(result[c] * w for c, w in RISK_WEIGHTS.items() if c in result.columns)
+    return result
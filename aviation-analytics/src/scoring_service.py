@@ -0,0 +1,232 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from scoring import MODELS_DIR, TURBULENCE_FEATURES, load_turbulence_model, predict_turbulence_batch
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies with percentile summaries.
+    """
+
+    def __init__(self, window=10_000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self.lock:
+            samples = np.array(self.samples)
+            count = self.count
+        if not len(samples):
+            return {'requests': count, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {'requests': count, 'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3)}
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-point requests into one predict_proba call.
+    A batch is scored when max_batch rows are waiting or max_wait_ms has passed since
+    the first row arrived, whichever comes first.
+    """
+
+    def __init__(self, model, le, max_batch=256, max_wait_ms=5):
+        self.model = model
+        self.le = le
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, row):
+        """
+        Queues one feature row (in TURBULENCE_FEATURES order) and returns a Future of its result dict.
+        """
+        future = Future()
+        self.pending.put((row, future))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self.pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                scored = predict_turbulence_batch(self.model, self.le, [row for row, _ in items])
+                results = scored.to_dict(orient='records')
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception:
+                # Rescore one by one so a bad row only fails its own request
+                for row, future in items:
+                    try:
+                        future.set_result(predict_turbulence_batch(self.model, self.le, [row]).to_dict(orient='records')[0])
+                    except Exception as e:
+                        future.set_exception(e)
+            self.batches += 1
+            self.rows += len(items)
+
+def parse_rows(body, content_type):
+    """
+    Parses a JSON object, a JSON list of objects or a CSV body into a DataFrame of TURBULENCE_FEATURES.
+    """
+    if 'csv' in content_type:
+        df = pd.read_csv(io.BytesIO(body))
+    else:
+        payload = json.loads(body)
+        df = pd.DataFrame([payload] if isinstance(payload, dict) else payload)
+    missing = [c for c in TURBULENCE_FEATURES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    return df[TURBULENCE_FEATURES].astype('float64')
+
+def check_finite(rows):
+    """
+    Raises ValueError naming the features that hold NaN or infinite values; models are trained
+    on complete rows only.
+    """
+    non_finite = rows.columns[~np.isfinite(rows.to_numpy()).all(axis=0)]
+    if len(non_finite):
+        raise ValueError(f"Non-finite values in: {', '.join(non_finite)}")
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """
+    POST /predict        one JSON object, micro-batched with concurrent requests
+    POST /predict/batch  JSON list or CSV (Content-Type: text/csv), scored in one call;
+                         answers in CSV when the request was CSV
+    GET  /stats          request count, p50/p99 latency and batching counters
+    GET  /health
+    """
+
+    batcher = None
+    latency = None
+    batch_latency = None
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload))
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            batcher = self.batcher
+            self._send_json(200, {
+                'predict': self.latency.summary(),
+                'predict_batch': self.batch_latency.summary(),
+                'micro_batches': batcher.batches,
+                'mean_micro_batch_size': round(batcher.rows / batcher.batches, 2) if batcher.batches else None,
+            })
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        content_type = self.headers.get('Content-Type', 'application/json')
+        # Bad input can surface in the headers, while parsing or only once the model sees it
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            rows = parse_rows(body, content_type)
+            if self.path == '/predict':
+                self._predict(rows, start)
+            elif self.path == '/predict/batch':
+                self._predict_batch(rows, content_type, start)
+            else:
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+        except (ValueError, TypeError, json.JSONDecodeError, pd.errors.ParserError) as e:
+            self._send_json(400, {'error': str(e)})
+
+    def _predict(self, rows, start):
+        if len(rows) != 1:
+            self._send_json(400, {'error': "/predict takes a single object; use /predict/batch"})
+            return
+        # Rejected here rather than by the model, so one bad row never reaches a micro-batch
+        check_finite(rows)
+        result = self.batcher.submit(rows.iloc[0].tolist()).result()
+        self._send_json(200, result)
+        self.latency.record(time.perf_counter() - start)
+
+    def _predict_batch(self, rows, content_type, start):
+        check_finite(rows)
+        scored = predict_turbulence_batch(self.batcher.model, self.batcher.le, rows)
+        if 'csv' in content_type:
+            self._send(200, pd.concat([rows, scored], axis=1).to_csv(index=False), 'text/csv')
+        else:
+            self._send_json(200, scored.to_dict(orient='records'))
+        self.batch_latency.record(time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        # Per-request logging dominates latency under load; /stats carries the numbers instead
+        pass
+
+class ScoringServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+def make_server(model, le, host='127.0.0.1', port=8000, max_batch=256, max_wait_ms=5):
+    """
+    Builds a threaded scoring server around a loaded turbulence model.
+    """
+    handler = type('Handler', (ScoringHandler,), {
+        'batcher': MicroBatcher(model, le, max_batch=max_batch, max_wait_ms=max_wait_ms),
+        'latency': LatencyTracker(),
+        'batch_latency': LatencyTracker(),
+    })
+    return ScoringServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Turbulence scoring service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    model, le = load_turbulence_model()
+    if model is None:
+        print(f"Turbulence model not found in {MODELS_DIR}. Run train_models.py first.")
+        return
+
+    server = make_server(model, le, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"Scoring turbulence on http://{args.host}:{args.port} (model: {type(model).__name__})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 
-import pandas as pd
 import sys
 import os
 from pathlib import Path
@@ -7,35 +6,81 @@ from pathlib import Path
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 
-from modeling import train_turbulence_model, train_aei_model
+from modeling import (
+    fit_turbulence_model, label_encoder_from_classes, train_aei_model, train_icing_model, load_tuned_config
+)
+from risk_grid import ICING_RISK_GRID_PATH, build_risk_grid
+from turbulence_store import TURBULENCE_STORE_DIR, TURBULENCE_LABELS, ICING_STORE_DIR, read_icing
+from feature_store import TURBULENCE_FEATURES_PATH, ensure_turbulence_features
+from incremental_training import train_turbulence_incremental
+from aei_utils import load_aei_frame
 
 PROCESSED_DIR = Path("aviation-analytics/data/processed")
 
+# Stream month partitions into the partitioned forest instead of fitting on the full matrix
+INCREMENTAL = "--incremental" in sys.argv
+
+def _flag_value(name):
+    return next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith(f"--{name}=")), None)
+
+# e.g. --turbulence-engine=hist_gradient_boosting; see modeling.TURBULENCE_ENGINES / ICING_ENGINES / AEI_ENGINES
+TURBULENCE_ENGINE = _flag_value("turbulence-engine")
+ICING_ENGINE = _flag_value("icing-engine")
+AEI_ENGINE = _flag_value("aei-engine")
+
+def resolve_config(task, engine_flag):
+    """
+    Engine and hyperparameters for a model: the winner from tuning.py unless an engine was
+    passed explicitly, in which case tuned parameters are used only if they are for that engine.
+    """
+    tuned_engine, tuned_params = load_tuned_config(task)
+    if engine_flag is None or engine_flag == tuned_engine:
+        return tuned_engine or engine_flag, tuned_params
+    return engine_flag, None
+
+def train_turbulence_full():
+    print(f"Loading Turbulence Features from {TURBULENCE_FEATURES_PATH}...")
+    # Memory-mapped model-ready matrix; rebuilt from the store only when the store has changed
+    X_turb, y_turb, meta = ensure_turbulence_features()
+    
+    if meta is not None:
+        le = label_encoder_from_classes(meta['classes'])
+        engine, params = resolve_config('turbulence', TURBULENCE_ENGINE)
+        clf = fit_turbulence_model(X_turb, y_turb, le, feature_version=meta['version'],
+                                   engine=engine, params=params)
+        build_risk_grid(clf, le)
+    else:
+        print(f"Turbulence data not found at {TURBULENCE_STORE_DIR}")
+
+def train_icing():
+    print(f"Loading Icing Data from {ICING_STORE_DIR}...")
+    df_icing = read_icing(columns=['timestamp', 'altitude', 'latitude', 'longitude', 'icing_intensity'])
+    
+    if not df_icing.empty:
+        engine, params = resolve_config('icing', ICING_ENGINE)
+        clf, le = train_icing_model(df_icing, engine=engine, params=params)
+        build_risk_grid(clf, le, ICING_RISK_GRID_PATH)
+    else:
+        print(f"Icing data not found at {ICING_STORE_DIR}")
+
 def main():
     # 1. Train Turbulence Model
-    turb_path = PROCESSED_DIR / "turbulence_cleaned.csv.gz"
-    if turb_path.exists():
-        print(f"Loading Turbulence Data from {turb_path}...")
-        # Read a sample if too large, or full
-        # Using chunksize or nrows might be needed for 2M rows if memory is tight
-        # But 2M rows with few columns is ~100MB, should be fine.
-        df_turb = pd.read_csv(turb_path, compression='gzip')
-        
-        # Convert timestamp back to datetime
-        df_turb['timestamp'] = pd.to_datetime(df_turb['timestamp'])
-        
-        train_turbulence_model(df_turb)
-    else:
-        print(f"Turbulence data not found at {turb_path}")
-
-    # 2. Train AEI Model
-    aei_path = PROCESSED_DIR / "airport_efficiency.csv.gz"
-    if aei_path.exists():
-        print(f"Loading AEI Data from {aei_path}...")
-        df_aei = pd.read_csv(aei_path, compression='gzip')
-        train_aei_model(df_aei)
+    if INCREMENTAL:
+        print(f"Training Turbulence Model incrementally from {TURBULENCE_STORE_DIR}...")
+        clf = train_turbulence_incremental()
+        if clf.members:
+            build_risk_grid(clf, label_encoder_from_classes(sorted(TURBULENCE_LABELS)))
     else:
-        print(f"AEI data not found at {aei_path}")
+        train_turbulence_full()
+
+    # 2. Train Icing Model
+    train_icing()
+
+    # 3. Train AEI Model
+    df_aei = load_aei_frame()
+    if not df_aei.empty:
+        engine, params = resolve_config('aei', AEI_ENGINE)
+        train_aei_model(df_aei, engine=engine, params=params)
 
 if __name__ == "__main__":
     main()
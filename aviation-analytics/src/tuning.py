@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import itertools
+import json
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from sklearn.metrics import f1_score, r2_score
+from sklearn.model_selection import KFold, StratifiedKFold, TimeSeriesSplit
+
+from modeling import (
+    MODELS_DIR, TUNED_PARAMS_PATH, TURBULENCE_FEATURES, TURBULENCE_ENGINES, ICING_ENGINES, AEI_ENGINES,
+    make_estimator, aei_feature_columns, turbulence_feature_frame
+)
+from feature_store import TURBULENCE_FEATURES_PATH, ensure_turbulence_features
+from turbulence_store import read_icing
+from aei_utils import load_aei_frame
+
+TUNING_DIR = MODELS_DIR / "tuning"
+
+TURBULENCE_GRIDS = {
+    'random_forest': {'n_estimators': [50, 100], 'max_depth': [10, 15, None], 'min_samples_leaf': [1, 5]},
+    'hist_gradient_boosting': {'learning_rate': [0.05, 0.1], 'max_leaf_nodes': [31, 63], 'l2_regularization': [0.0, 1.0]},
+}
+
+AEI_GRIDS = {
+    'gradient_boosting': {'n_estimators': [100, 200], 'max_depth': [3, 5], 'learning_rate': [0.05, 0.1]},
+    'hist_gradient_boosting': {'max_iter': [100, 200], 'max_depth': [3, 5, None], 'learning_rate': [0.05, 0.1]},
+}
+
+# Classification is scored on weighted F1 (as in classification_report), regression on R2
+TASKS = {
+    'turbulence': {'engines': TURBULENCE_ENGINES, 'grids': TURBULENCE_GRIDS, 'classifier': True},
+    'icing': {'engines': ICING_ENGINES, 'grids': TURBULENCE_GRIDS, 'classifier': True},
+    'aei': {'engines': AEI_ENGINES, 'grids': AEI_GRIDS, 'classifier': False},
+}
+
+def expand_grid(grid):
+    """
+    Every combination of a {param: [values]} grid as a list of dicts.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def _file_digest(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+def _save_task_arrays(task, X, y, features):
+    task_dir = TUNING_DIR / task
+    task_dir.mkdir(parents=True, exist_ok=True)
+    X_path, y_path = task_dir / "X.npy", task_dir / "y.npy"
+    np.save(X_path, X)
+    np.save(y_path, y)
+    with open(task_dir / "features.json", 'w') as f:
+        json.dump(features, f)
+    return X_path, y_path
+
+def prepare_task_data(task):
+    """
+    Returns (X path, y path) of memory-mappable .npy files for a task, rows in time order.
+    Turbulence reuses the feature store; icing reports and AEI rollups are written under TUNING_DIR.
+    """
+    if task == 'turbulence':
+        _, _, meta = ensure_turbulence_features()
+        if meta is None:
+            return None, None
+        return TURBULENCE_FEATURES_PATH, TURBULENCE_FEATURES_PATH.with_name(TURBULENCE_FEATURES_PATH.stem + "_labels.npy")
+
+    if task == 'icing':
+        df = read_icing(columns=['timestamp', 'altitude', 'latitude', 'longitude', 'icing_intensity'])
+        if df.empty:
+            return None, None
+        df = df.sort_values('timestamp', kind='stable')
+        # Codes of the sorted class names, as LabelEncoder assigns them in train_icing_model
+        _, y = np.unique(df['icing_intensity'].astype(str).to_numpy(), return_inverse=True)
+        X = turbulence_feature_frame(df).to_numpy(dtype=np.float32, na_value=np.nan)
+        return _save_task_arrays(task, X, y.astype(np.int8), TURBULENCE_FEATURES)
+
+    df = load_aei_frame()
+    if df.empty:
+        return None, None
+    features = aei_feature_columns(df)
+    df = df.dropna(subset=features + ['avg_dep_delay'])
+    if 'YEAR' in df.columns:
+        df = df.sort_values(['YEAR', 'month'], kind='stable')
+    return _save_task_arrays(task, df[features].to_numpy(dtype=np.float64),
+                             df['avg_dep_delay'].to_numpy(dtype=np.float64), features)
+
+def cv_splits(y, cv, n_splits, classifier):
+    """
+    Fold index pairs. 'time' trains on earlier rows and validates on the following block;
+    'kfold' shuffles (stratified for classifiers).
+    """
+    if cv == 'time':
+        return list(TimeSeriesSplit(n_splits=n_splits).split(y))
+    splitter = (StratifiedKFold if classifier else KFold)(n_splits=n_splits, shuffle=True, random_state=42)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+def _run_fold(task, X_path, y_path, engine, params, cv, n_splits, fold):
+    # Workers map the same files, so the training data is shared through the page cache, not copied
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    spec = TASKS[task]
+    train_idx, test_idx = cv_splits(y, cv, n_splits, spec['classifier'])[fold]
+
+    _, model = make_estimator(spec['engines'], engine, params)
+    # The process pool already uses every core
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X[test_idx])
+    if spec['classifier']:
+        score = f1_score(y[test_idx], y_pred, average='weighted')
+    else:
+        score = r2_score(y[test_idx], y_pred)
+    return {'score': float(score), 'fit_seconds': fit_seconds, 'n_train': len(train_idx), 'n_test': len(test_idx)}
+
+def run_search(task, cv='kfold', n_splits=5, max_workers=None, engines=None):
+    """
+    Cross-validates every engine/parameter combination of a task in a process pool.
+    Each fold result is cached as JSON under TUNING_DIR/<task>/<data hash>/, so an
+    interrupted search resumes where it stopped and reruns on unchanged data are free.
+    Returns a DataFrame with one row per configuration, best first.
+    """
+    X_path, y_path = prepare_task_data(task)
+    if X_path is None:
+        print(f"No training data for {task}")
+        return pd.DataFrame()
+
+    spec = TASKS[task]
+    cache_dir = TUNING_DIR / task / _file_digest(X_path, y_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    configs = [(engine, params) for engine in (engines or spec['grids'])
+               for params in expand_grid(spec['grids'][engine])]
+    jobs = {}
+    for engine, params in configs:
+        for fold in range(n_splits):
+            key = json.dumps({'engine': engine, 'params': params, 'cv': cv, 'n_splits': n_splits, 'fold': fold},
+                             sort_keys=True)
+            jobs[key] = cache_dir / (hashlib.sha1(key.encode()).hexdigest()[:16] + ".json")
+
+    todo = [key for key, path in jobs.items() if not path.exists()]
+    print(f"{task}: {len(configs)} configs x {n_splits} folds ({cv}), {len(jobs) - len(todo)} cached, {len(todo)} to run")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for key in todo:
+            job = json.loads(key)
+            futures[pool.submit(_run_fold, task, X_path, y_path, job['engine'], job['params'],
+                                cv, n_splits, job['fold'])] = key
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            result = {**json.loads(key), **future.result()}
+            # Written atomically, so a crash mid-write never leaves a truncated cache entry
+            tmp_path = jobs[key].with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+            tmp_path.replace(jobs[key])
+            if done % 10 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} folds done")
+
+    rows = []
+    for path in jobs.values():
+        with open(path) as f:
+            rows.append(json.load(f))
+    folds = pd.DataFrame(rows)
+    folds['config'] = folds.apply(lambda r: json.dumps({'engine': r['engine'], 'params': r['params']}, sort_keys=True),
+                                  axis=1)
+    summary = folds.groupby('config').agg(mean_score=('score', 'mean'), std_score=('score', 'std'),
+                                          fit_seconds=('fit_seconds', 'mean')).reset_index()
+    summary = summary.sort_values('mean_score', ascending=False).reset_index(drop=True)
+    config = summary['config'].map(json.loads)
+    summary.insert(0, 'engine', config.map(lambda c: c['engine']))
+    summary.insert(1, 'params', config.map(lambda c: c['params']))
+    return summary.drop(columns='config')
+
+def save_best_config(task, summary, cv, path=TUNED_PARAMS_PATH):
+    """
+    Records the winning configuration of a task in tuned_params.json for train_models.py.
+    """
+    path = Path(path)
+    config = {}
+    if path.exists():
+        with open(path) as f:
+            config = json.load(f)
+    best = summary.iloc[0]
+    config[task] = {'engine': best['engine'], 'params': best['params'],
+                    'score': float(best['mean_score']), 'cv': cv}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # train_models.py may read the file while a search finishes, so it is replaced whole
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(config, f, indent=2)
+    tmp_path.replace(path)
+    print(f"Best {task}: {best['engine']} {best['params']} (score {best['mean_score']:.4f}). Saved to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search")
+    parser.add_argument('--task', choices=list(TASKS) + ['all'], default='all')
+    parser.add_argument('--cv', choices=['kfold', 'time'], default='kfold')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    for task in (list(TASKS) if args.task == 'all' else [args.task]):
+        summary = run_search(task, cv=args.cv, n_splits=args.folds, max_workers=args.workers)
+        if not summary.empty:
+            print(summary.head(10).to_string())
+            save_best_config(task, summary, args.cv)
+
+# Worker processes re-import this module on spawn-based platforms, so the search must not run at import
+if __name__ == "__main__":
+    main()
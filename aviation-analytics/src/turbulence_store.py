@@ -0,0 +1,185 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+
+TURBULENCE_STORE_DIR = Path("aviation-analytics/data/processed/turbulence")
+
+# Icing reports from the same ingestion pass; same layout, tracked by the turbulence store manifest
+ICING_STORE_DIR = Path("aviation-analytics/data/processed/icing")
+
+TURBULENCE_LABELS = ['None', 'Light', 'Moderate', 'Severe']
+ICING_LABELS = TURBULENCE_LABELS
+
+# Bumped whenever cleaning changes the stored columns or rows, so older partitions get rebuilt
+STORE_SCHEMA_VERSION = 4
+
+# Fields parsed from the REPORT text (see pirep_parser.REPORT_FEATURES)
+REPORT_FLOAT_COLUMNS = ['turbulence_base', 'turbulence_top', 'temperature_c', 'wind_direction', 'wind_speed_kt']
+
+# Hive-style year=YYYY/month=M directories with explicit types so partition keys
+# come back as small integers instead of inferred dictionaries
+STORE_PARTITIONING = ds.partitioning(
+    pa.schema([('year', pa.int16()), ('month', pa.int8())]),
+    flavor='hive'
+)
+
+def to_store_dtypes(df):
+    """
+    Casts a cleaned turbulence or icing DataFrame to the compact dtypes used on disk.
+    Altitude stays nullable because some PIREPs carry no flight level.
+    """
+    df = df.copy()
+    df['latitude'] = df['latitude'].astype('float32')
+    df['longitude'] = df['longitude'].astype('float32')
+    df['altitude'] = df['altitude'].round().astype('Int32')
+    if 'turbulence_intensity' in df.columns:
+        df['turbulence_intensity'] = pd.Categorical(df['turbulence_intensity'], categories=TURBULENCE_LABELS)
+    if 'icing_intensity' in df.columns:
+        df['icing_intensity'] = pd.Categorical(df['icing_intensity'], categories=ICING_LABELS)
+    for column in REPORT_FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('float32')
+    df['year'] = df['timestamp'].dt.year.astype('int16')
+    df['month'] = df['timestamp'].dt.month.astype('int8')
+    return df
+
+def write_turbulence_partitions(df, source_name, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Appends a cleaned turbulence (or icing) DataFrame to a partitioned Parquet store.
+    Files are named after the raw source file so a source can later be replaced
+    without touching partitions written from other files.
+    """
+    if df.empty:
+        return
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(to_store_dtypes(df), preserve_index=False)
+    ds.write_dataset(
+        table,
+        store_dir,
+        format='parquet',
+        partitioning=STORE_PARTITIONING,
+        basename_template=f"{source_name}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+def read_turbulence(columns=None, filters=None, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Loads turbulence reports from the partitioned store.
+    Args:
+        columns (list): Columns to load; only these are read from disk.
+        filters: pandas-style DNF filters, e.g. [('year', '==', 2020), ('altitude', '>=', 20000)],
+            or a pyarrow expression. Partition keys prune whole directories and other
+            columns are pushed down to Parquet row-group statistics.
+    """
+    store_dir = Path(store_dir)
+    if not store_dir.exists():
+        return pd.DataFrame()
+
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+
+    dataset = ds.dataset(store_dir, format='parquet', partitioning=STORE_PARTITIONING)
+    return dataset.to_table(columns=columns, filter=filters).to_pandas()
+
+def read_icing(columns=None, filters=None, store_dir=ICING_STORE_DIR):
+    """
+    Loads icing reports from the partitioned icing store; arguments as for read_turbulence.
+    """
+    return read_turbulence(columns=columns, filters=filters, store_dir=store_dir)
+
+MANIFEST_NAME = "_manifest.json"
+
+def file_fingerprint(path, previous=None):
+    """
+    Returns size, mtime and SHA-256 of a raw file. When size and mtime match a
+    previous manifest entry the stored hash is reused instead of re-reading the file.
+    """
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime:
+        fingerprint['sha256'] = previous['sha256']
+        return fingerprint
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+def load_manifest(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Loads the per-source-file manifest ({path: {size, mtime, sha256, raw_rows, duplicate_rows, clean_rows, icing_rows, schema}}).
+    """
+    path = Path(store_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Atomically writes the manifest next to the partitions (ignored by Parquet readers).
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(store_dir / MANIFEST_NAME)
+
+def _source_partitions(source_name, store_dir):
+    # Raw file names may contain glob characters such as '[' (e.g. "pireps [copy].csv"), and
+    # the glob alone would also match other sources named "<source_name>-..." (pireps_2020-01)
+    pattern = re.compile(re.escape(source_name) + r"-\d+\.parquet")
+    return (path for path in Path(store_dir).glob(f"year=*/month=*/{glob.escape(source_name)}-*.parquet")
+            if pattern.fullmatch(path.name))
+
+def remove_source_partitions(source_name, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Deletes every partition file written from the given raw source file.
+    """
+    for path in _source_partitions(source_name, store_dir):
+        path.unlink()
+
+def has_source_partitions(source_name, store_dir=TURBULENCE_STORE_DIR):
+    """
+    True when at least one partition file written from the given raw source file exists.
+    """
+    return next(_source_partitions(source_name, store_dir), None) is not None
+
+def clear_store(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Deletes a store directory with its partitions, manifest and derived files (e.g. cube fragments).
+    """
+    store_dir = Path(store_dir)
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+
+def list_partitions(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Returns the sorted (year, month) pairs present in the store.
+    """
+    partitions = set()
+    for path in Path(store_dir).glob("year=*/month=*"):
+        if path.is_dir() and any(path.glob("*.parquet")):
+            partitions.add((int(path.parent.name.split('=')[1]), int(path.name.split('=')[1])))
+    return sorted(partitions)
+
+def partition_fingerprint(year, month, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Names, sizes and mtimes of the files in one partition; changes whenever any
+    source file contributing to that month is rewritten.
+    """
+    directory = Path(store_dir) / f"year={year}" / f"month={month}"
+    return sorted((p.name, p.stat().st_size, p.stat().st_mtime) for p in directory.glob("*.parquet"))
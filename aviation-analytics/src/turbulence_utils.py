@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from turbulence_store import TURBULENCE_STORE_DIR
+
+EARTH_RADIUS_NM = 3440.065
+
+# Severity on a 0-1 scale, used to weight binned intensity
+SEVERITY_WEIGHTS = {'None': 0.0, 'Light': 1 / 3, 'Moderate': 2 / 3, 'Severe': 1.0}
+
+def _unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def _angle_between(a, b):
+    # atan2 form stays accurate for both tiny and near-antipodal angles
+    return np.arctan2(np.linalg.norm(np.cross(a, b), axis=-1), np.sum(a * b, axis=-1))
+
+def great_circle_points(start, end, n=50):
+    """
+    Returns (lats, lons) of n points along the great circle from start to end.
+    Args:
+        start, end (dict): {'lat': ..., 'lon': ...} as used by the dashboard airport table.
+    """
+    p1 = _unit_vectors(start['lat'], start['lon'])
+    p2 = _unit_vectors(end['lat'], end['lon'])
+    omega = _angle_between(p1, p2)
+    t = np.linspace(0, 1, n)[:, None]
+    if omega == 0:
+        points = np.repeat(p1[None, :], n, axis=0)
+    else:
+        points = (np.sin((1 - t) * omega) * p1 + np.sin(t * omega) * p2) / np.sin(omega)
+    lats = np.degrees(np.arcsin(np.clip(points[:, 2], -1, 1)))
+    lons = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+    return lats, lons
+
+def distance_to_route_nm(lat, lon, start, end):
+    """
+    Great-circle distance in nautical miles from each point to the route segment start -> end.
+    Points whose projection falls beyond an endpoint are measured to that endpoint.
+    """
+    q = _unit_vectors(lat, lon)
+    p1 = _unit_vectors(start['lat'], start['lon'])
+    p2 = _unit_vectors(end['lat'], end['lon'])
+    normal = np.cross(p1, p2)
+    norm = np.linalg.norm(normal)
+    if norm == 0:
+        return _angle_between(q, p1) * EARTH_RADIUS_NM
+    normal /= norm
+
+    cross_track = np.abs(np.arcsin(np.clip(q @ normal, -1, 1)))
+    # Foot of the perpendicular on the great circle; inside the segment if it lies between p1 and p2
+    foot = q - np.outer(q @ normal, normal)
+    within = (np.cross(p1, foot) @ normal >= 0) & (np.cross(foot, p2) @ normal >= 0)
+    to_ends = np.minimum(_angle_between(q, p1), _angle_between(q, p2))
+    return np.where(within, cross_track, to_ends) * EARTH_RADIUS_NM
+
+class PirepGridIndex:
+    """
+    Bucket index over report positions on a regular lat/lon grid.
+    Row positions are sorted by cell so each cell's reports are one contiguous slice,
+    which makes corridor lookups proportional to the cells touched instead of the table size.
+    """
+
+    def __init__(self, latitude, longitude, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self.n_cols = int(np.ceil(360 / cell_deg))
+        cell_ids = self._cell_ids(np.asarray(latitude), np.asarray(longitude))
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.cell_ids, self.starts, counts = np.unique(cell_ids[self.order], return_index=True, return_counts=True)
+        self.ends = self.starts + counts
+
+    def _cell_ids(self, lat, lon):
+        rows = np.floor((np.asarray(lat, dtype=np.float64) + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lon, dtype=np.float64) + 180) / self.cell_deg).astype(np.int64) % self.n_cols
+        return rows * self.n_cols + cols
+
+    def positions_in_cells(self, cell_ids):
+        """
+        Row positions (for .iloc) of every report in the given cells.
+        """
+        cell_ids = np.unique(cell_ids)
+        found = np.searchsorted(self.cell_ids, cell_ids)
+        found = found[(found < len(self.cell_ids)) & (self.cell_ids[np.minimum(found, len(self.cell_ids) - 1)] == cell_ids)]
+        if len(found) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[s:e] for s, e in zip(self.starts[found], self.ends[found])])
+
+    def corridor_cells(self, start, end, width_nm):
+        """
+        Cells within width_nm of the great-circle route, found by sweeping a box along sampled path points.
+        """
+        lat_pad = width_nm / 60 + self.cell_deg
+        # Sample at least twice per cell so no cell along the path is skipped
+        route_nm = _angle_between(_unit_vectors(start['lat'], start['lon']),
+                                  _unit_vectors(end['lat'], end['lon'])) * EARTH_RADIUS_NM
+        n = max(2, int(np.ceil(route_nm / 60 / self.cell_deg * 2)) + 1)
+        lats, lons = great_circle_points(start, end, n)
+
+        cells = []
+        offsets = np.arange(-lat_pad, lat_pad + self.cell_deg, self.cell_deg)
+        for lat, lon in zip(lats, lons):
+            lon_pad = lat_pad / max(np.cos(np.radians(min(abs(lat) + lat_pad, 89.0))), 1e-3)
+            lon_offsets = np.arange(-lon_pad, lon_pad + self.cell_deg, self.cell_deg)
+            grid_lat, grid_lon = np.meshgrid(np.clip(lat + offsets, -90, 89.999), lon + lon_offsets, indexing='ij')
+            cells.append(self._cell_ids(grid_lat.ravel(), grid_lon.ravel()))
+        return np.unique(np.concatenate(cells))
+
+def corridor_query(index, df, start, end, width_nm=50, altitude_range=None):
+    """
+    Returns reports within width_nm of the great-circle route from start to end,
+    optionally restricted to an altitude band (see altitude_band), with a 'route_distance_nm' column.
+    Args:
+        index (PirepGridIndex): Index built over df['latitude'], df['longitude'].
+    """
+    candidates = df.iloc[np.sort(index.positions_in_cells(index.corridor_cells(start, end, width_nm)))]
+    if altitude_range is not None:
+        candidates = candidates[in_altitude_band(candidates['altitude'], altitude_range)]
+
+    distance = distance_to_route_nm(candidates['latitude'].to_numpy(), candidates['longitude'].to_numpy(), start, end)
+    result = candidates[distance <= width_nm].copy()
+    result['route_distance_nm'] = distance[distance <= width_nm]
+    return result
+
+def cell_size_for_zoom(zoom, pixels_per_cell=16):
+    """
+    Square cell size in degrees that spans roughly pixels_per_cell screen pixels at a web-map zoom level.
+    """
+    return 360 / (256 * 2 ** zoom) * pixels_per_cell
+
+def bin_reports(df, cell_deg, max_cells=5000, weight_col=None):
+    """
+    Aggregates every report into square lat/lon cells with counts and mean severity.
+    The cell size is doubled until at most max_cells non-empty cells remain, so the payload
+    sent to the browser stays small while still reflecting all rows.
+    Args:
+        weight_col (str): Optional per-row report count, for re-binning already aggregated rows.
+    Returns a DataFrame with cell-centre latitude/longitude, count, severe count and mean_severity.
+    """
+    lat = df['latitude'].to_numpy(dtype=np.float64)
+    lon = df['longitude'].to_numpy(dtype=np.float64)
+    # Weights are looked up once per distinct label and gathered through the codes
+    codes, labels = pd.factorize(df['turbulence_intensity'])
+    severity = np.append([SEVERITY_WEIGHTS.get(label, 0.0) for label in labels], 0.0)[codes]
+    severe = np.append([label == 'Severe' for label in labels], False)[codes]
+    weights = np.ones(len(df)) if weight_col is None else df[weight_col].to_numpy(dtype=np.float64)
+
+    while True:
+        n_cols = int(np.ceil(360 / cell_deg))
+        rows = np.floor((lat + 90) / cell_deg).astype(np.int64)
+        cols = np.floor((lon + 180) / cell_deg).astype(np.int64)
+        cell_ids, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+        if len(cell_ids) <= max_cells:
+            break
+        cell_deg *= 2
+
+    counts = np.bincount(inverse, weights=weights, minlength=len(cell_ids))
+    return pd.DataFrame({
+        'latitude': (cell_ids // n_cols + 0.5) * cell_deg - 90,
+        'longitude': (cell_ids % n_cols + 0.5) * cell_deg - 180,
+        'count': counts.astype(np.int64),
+        'severe': np.bincount(inverse, weights=severe * weights, minlength=len(cell_ids)).astype(np.int64),
+        'mean_severity': np.bincount(inverse, weights=severity * weights, minlength=len(cell_ids)) / counts,
+    })
+
+TURBULENCE_CUBE_PATH = Path("aviation-analytics/data/processed/turbulence_cube.parquet")
+
+CUBE_ALT_BIN_FT = 1000
+CUBE_CELL_DEG = 0.25
+
+CUBE_KEYS = ['turbulence_intensity', 'alt_bin', 'period', 'cell_lat', 'cell_lon']
+CUBE_COLUMNS = CUBE_KEYS + ['count', 'altitude_sum']
+
+def altitude_band(altitude_range, alt_bin_ft=CUBE_ALT_BIN_FT):
+    """
+    Altitudes in feet selected by an altitude slider, as the half-open band [low, high).
+    Both ends are rounded down to alt_bin_ft so the band is made of whole cube bins, and
+    the cube and the raw reports are filtered by the same rule.
+    """
+    return altitude_range[0] // alt_bin_ft * alt_bin_ft, altitude_range[1] // alt_bin_ft * alt_bin_ft
+
+def in_altitude_band(altitudes, altitude_range, alt_bin_ft=CUBE_ALT_BIN_FT):
+    """
+    Boolean mask of the altitudes inside altitude_band(altitude_range).
+    """
+    low, high = altitude_band(altitude_range, alt_bin_ft)
+    return (altitudes >= low) & (altitudes < high)
+
+def build_filter_cube(df, alt_bin_ft=CUBE_ALT_BIN_FT, cell_deg=CUBE_CELL_DEG):
+    """
+    Pre-aggregates reports into counts by (intensity, altitude bin, month, spatial cell).
+    The cube's size depends on how many of those combinations occur, not on the row count,
+    so dashboard filters can be answered without rescanning the reports.
+    Reports without an altitude get alt_bin -1.
+    """
+    cube = pd.DataFrame({
+        'turbulence_intensity': df['turbulence_intensity'],
+        'alt_bin': (df['altitude'] // alt_bin_ft).fillna(-1).astype('int16'),
+        'period': df['timestamp'].dt.to_period('M').dt.to_timestamp(),
+        'cell_lat': ((np.floor((df['latitude'] + 90) / cell_deg) + 0.5) * cell_deg - 90).astype('float32'),
+        'cell_lon': ((np.floor((df['longitude'] + 180) / cell_deg) + 0.5) * cell_deg - 180).astype('float32'),
+        'altitude': df['altitude'].astype('float64'),
+    })
+    cube = cube.groupby(CUBE_KEYS, observed=True).agg(
+        count=('alt_bin', 'size'),
+        altitude_sum=('altitude', 'sum')
+    ).reset_index()
+    cube['count'] = cube['count'].astype('int32')
+    return cube
+
+def merge_filter_cubes(cubes):
+    """
+    Sums filter cubes built from disjoint sets of reports. Counts and altitude sums are
+    additive, so the result equals build_filter_cube over all of those reports.
+    """
+    cubes = [cube for cube in cubes if not cube.empty]
+    if not cubes:
+        return pd.DataFrame()
+    cube = pd.concat(cubes, ignore_index=True)
+    cube = cube.groupby(CUBE_KEYS, observed=True)[['count', 'altitude_sum']].sum().reset_index()
+    cube['count'] = cube['count'].astype('int32')
+    return cube
+
+def cube_fragments_dir(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Per-source filter cubes live inside the store; Parquet readers skip '_' directories.
+    """
+    return Path(store_dir) / "_cube"
+
+def write_cube_fragment(df, source_name, store_dir=TURBULENCE_STORE_DIR):
+    """
+    Saves the filter cube of one raw source file's cleaned reports (in store dtypes),
+    replacing any earlier fragment of that source.
+    """
+    path = cube_fragments_dir(store_dir) / f"{source_name}.parquet"
+    if df.empty:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    build_filter_cube(df).to_parquet(path, index=False)
+
+def remove_cube_fragment(source_name, store_dir=TURBULENCE_STORE_DIR):
+    (cube_fragments_dir(store_dir) / f"{source_name}.parquet").unlink(missing_ok=True)
+
+def has_cube_fragment(source_name, store_dir=TURBULENCE_STORE_DIR):
+    return (cube_fragments_dir(store_dir) / f"{source_name}.parquet").exists()
+
+def load_cube_fragments(store_dir=TURBULENCE_STORE_DIR):
+    """
+    Merges every per-source fragment into the dashboard filter cube.
+    Costs one pass over the fragments, which are bounded by the cube's cells, not by the report count.
+    """
+    paths = sorted(cube_fragments_dir(store_dir).glob("*.parquet"))
+    return merge_filter_cubes([pd.read_parquet(path) for path in paths])
+
+def ensure_filter_cube(store_dir=TURBULENCE_STORE_DIR, path=TURBULENCE_CUBE_PATH):
+    """
+    Rewrites the merged filter cube when any fragment was added, replaced or removed since
+    it was last written. Returns True when the cube was rewritten.
+    """
+    path = Path(path)
+    fragments_dir = cube_fragments_dir(store_dir)
+    if not fragments_dir.exists():
+        return False
+    # Removing a fragment only touches the directory's mtime
+    newest = max([fragments_dir.stat().st_mtime] + [p.stat().st_mtime for p in fragments_dir.glob("*.parquet")])
+    if path.exists() and path.stat().st_mtime >= newest:
+        return False
+
+    cube = load_cube_fragments(store_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    cube.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+    return True
+
+def slice_filter_cube(cube, intensities, altitude_range, alt_bin_ft=CUBE_ALT_BIN_FT):
+    """
+    Cube rows matching the intensity multiselect and altitude slider, i.e. the bins inside
+    altitude_band(altitude_range); the top bin is excluded, as in in_altitude_band.
+    """
+    low, high = altitude_band(altitude_range, alt_bin_ft)
+    bins = cube['alt_bin']
+    return cube[cube['turbulence_intensity'].isin(intensities) & (bins >= low // alt_bin_ft) & (bins < high // alt_bin_ft)]
+
+def cube_summary(cube_slice):
+    """
+    Total reports, severe reports and mean altitude of a cube slice.
+    """
+    total = int(cube_slice['count'].sum())
+    severe = int(cube_slice.loc[cube_slice['turbulence_intensity'] == 'Severe', 'count'].sum())
+    avg_altitude = cube_slice['altitude_sum'].sum() / total if total else float('nan')
+    return {'total': total, 'severe': severe, 'avg_altitude': avg_altitude}
+
+def cube_monthly_counts(cube_slice):
+    """
+    Report counts per calendar month, equivalent to resampling the raw timestamps monthly.
+    """
+    counts = cube_slice.groupby('period')['count'].sum()
+    if counts.empty:
+        return pd.DataFrame(columns=['timestamp', 'count'])
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq='MS')
+    counts = counts.reindex(full_range, fill_value=0)
+    return pd.DataFrame({'timestamp': counts.index, 'count': counts.to_numpy()})
+
+def cube_altitude_box_stats(cube_slice):
+    """
+    Box-plot statistics of altitude per intensity from the altitude-bin histogram.
+    Each bin is represented by the mean altitude of its reports, so quartiles are exact
+    whenever the reports in a bin share a flight level.
+    Returns a DataFrame with q1, median, q3, lowerfence and upperfence per intensity.
+    """
+    hist = cube_slice.groupby(['turbulence_intensity', 'alt_bin'], observed=True)[['count', 'altitude_sum']].sum()
+    rows = []
+    for intensity, group in hist.groupby(level=0, observed=True):
+        values = (group['altitude_sum'] / group['count']).to_numpy()
+        cum = group['count'].cumsum().to_numpy()
+
+        def quantile(q):
+            return values[np.searchsorted(cum, q * cum[-1])]
+
+        q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+        iqr = q3 - q1
+        rows.append({
+            'turbulence_intensity': intensity,
+            'q1': q1,
+            'median': median,
+            'q3': q3,
+            'lowerfence': values[values >= q1 - 1.5 * iqr].min(),
+            'upperfence': values[values <= q3 + 1.5 * iqr].max(),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Modules resolve data and model paths relative to the repository root, like the pipeline scripts
+os.chdir(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, "aviation-analytics", "src"))
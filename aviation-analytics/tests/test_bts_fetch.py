@@ -0,0 +1,99 @@
+import io
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import aei_utils
+from aei_utils import aggregate_bts_month, bts_month_filename, fetch_bts_month, fetch_bts_months
+
+def make_fixture_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        rows = "\n".join(f"2023,1,{day % 28 + 1},AA,LAX,SFO,{day % 30},{day % 20},0.00,0.00" for day in range(2000))
+        zf.writestr("On_Time.csv", "Year,Month,DayofMonth,Reporting_Airline,Origin,Dest,DepDelay,ArrDelay,"
+                                   "Cancelled,Diverted\n" + rows + "\n")
+    return buffer.getvalue()
+
+class BtsStandIn(BaseHTTPRequestHandler):
+    """
+    Serves the same zip for every month, honouring Range requests. The first
+    `failures` requests are answered with a 503.
+    """
+
+    body = b''
+    failures = 0
+    requests = []
+
+    def do_GET(self):
+        range_header = self.headers.get('Range')
+        type(self).requests.append((self.path, range_header))
+        if type(self).failures:
+            type(self).failures -= 1
+            self.send_error(503)
+            return
+
+        start = int(range_header.split('=')[1].rstrip('-')) if range_header else 0
+        if start >= len(self.body):
+            self.send_response(416)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = self.body[start:]
+        self.send_response(206 if range_header else 200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def bts_server(monkeypatch):
+    handler = type('Handler', (BtsStandIn,), {'body': make_fixture_zip(), 'failures': 0, 'requests': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Retries back off for seconds; the stand-in does not need it
+    monkeypatch.setattr(aei_utils.time, 'sleep', lambda seconds: None)
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def test_cold_fetch_then_cache_hit(tmp_path, bts_server):
+    handler, base_url = bts_server
+    months = [(2023, 1), (2023, 2), (2023, 3)]
+
+    paths = fetch_bts_months(months, max_workers=3, cache_dir=tmp_path, base_url=base_url)
+    assert all(paths[ym].read_bytes() == handler.body for ym in months)
+    assert len(handler.requests) == 3
+    assert not list(tmp_path.glob("*.part"))
+    assert aggregate_bts_month(paths[(2023, 1)])['flights'].sum() == 2000
+
+    again = fetch_bts_months(months, max_workers=3, cache_dir=tmp_path, base_url=base_url)
+    assert again == paths
+    assert len(handler.requests) == 3
+
+def test_resume_from_truncated_part_file(tmp_path, bts_server):
+    handler, base_url = bts_server
+    half = len(handler.body) // 2
+    (tmp_path / (bts_month_filename(2023, 1) + ".part")).write_bytes(handler.body[:half])
+
+    path = fetch_bts_month(2023, 1, cache_dir=tmp_path, base_url=base_url)
+    assert path.read_bytes() == handler.body
+    assert handler.requests == [(f"/{bts_month_filename(2023, 1)}", f"bytes={half}-")]
+
+def test_retry_after_server_error(tmp_path, bts_server):
+    handler, base_url = bts_server
+    handler.failures = 2
+
+    path = fetch_bts_month(2023, 1, cache_dir=tmp_path, base_url=base_url, retries=3)
+    assert path.read_bytes() == handler.body
+    assert len(handler.requests) == 3
+
+def test_gives_up_after_retries(tmp_path, bts_server):
+    handler, base_url = bts_server
+    handler.failures = 5
+
+    assert fetch_bts_month(2023, 1, cache_dir=tmp_path, base_url=base_url, retries=2) is None
+    assert len(handler.requests) == 2
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import (
+    GradientBoostingRegressor, HistGradientBoostingClassifier, HistGradientBoostingRegressor, RandomForestClassifier
+)
+
+from compact_model import CompactModel, export_compact_model
+from scoring import TURBULENCE_FEATURES
+
+def make_features(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'altitude': rng.uniform(0, 45000, n),
+        'latitude': rng.uniform(20, 55, n),
+        'longitude': rng.uniform(-130, -65, n),
+        'month': rng.integers(1, 13, n).astype(float),
+        'hour': rng.integers(0, 24, n).astype(float),
+    }).astype('float32')
+    # Reports without a flight level, as in the store
+    X.loc[rng.random(n) < 0.05, 'altitude'] = np.nan
+    y = ((X['altitude'].fillna(20000) > 25000).astype(int) + (X['month'] > 6) + (rng.random(n) < 0.1)).to_numpy()
+    return X, y
+
+CLASSIFIERS = {
+    'random_forest': lambda: RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0),
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=30, random_state=0),
+}
+
+REGRESSORS = {
+    'gradient_boosting': lambda: GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0),
+    'hist_gradient_boosting': lambda: HistGradientBoostingRegressor(max_iter=30, random_state=0),
+}
+
+@pytest.mark.parametrize('engine', list(CLASSIFIERS))
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_classifier_parity(tmp_path, engine, n_classes):
+    X, y = make_features()
+    y = np.minimum(y, n_classes - 1)
+    model = CLASSIFIERS[engine]().fit(X, y)
+    export_compact_model(model, tmp_path / "model.npz", label_names=['None', 'Light', 'Moderate'][:n_classes])
+    compact = CompactModel(tmp_path / "model.npz")
+
+    X_new, _ = make_features(seed=1)
+    np.testing.assert_allclose(compact.predict_proba(X_new), model.predict_proba(X_new), atol=1e-9)
+    np.testing.assert_array_equal(compact.predict(X_new), model.predict(X_new))
+    assert compact.label_encoder.inverse_transform(compact.classes_).tolist() == ['None', 'Light', 'Moderate'][:n_classes]
+
+@pytest.mark.parametrize('engine', list(REGRESSORS))
+def test_regressor_parity(tmp_path, engine):
+    X, y = make_features()
+    X = X.fillna(0) if engine == 'gradient_boosting' else X
+    target = X['altitude'].fillna(20000) / 1000 + y * 5
+    model = REGRESSORS[engine]().fit(X, target)
+    export_compact_model(model, tmp_path / "model.npz")
+    compact = CompactModel(tmp_path / "model.npz")
+
+    X_new, _ = make_features(seed=1)
+    X_new = X_new.fillna(0) if engine == 'gradient_boosting' else X_new
+    np.testing.assert_allclose(compact.predict(X_new), model.predict(X_new), rtol=1e-9, atol=1e-9)
+
+def test_columns_are_matched_by_name(tmp_path):
+    X, y = make_features()
+    model = CLASSIFIERS['random_forest']().fit(X, y)
+    export_compact_model(model, tmp_path / "model.npz")
+    compact = CompactModel(tmp_path / "model.npz")
+
+    shuffled = X[TURBULENCE_FEATURES[::-1]]
+    np.testing.assert_allclose(compact.predict_proba(shuffled), model.predict_proba(X), atol=1e-9)
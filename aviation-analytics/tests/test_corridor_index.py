@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from turbulence_utils import (
+    EARTH_RADIUS_NM, PirepGridIndex, corridor_query, distance_to_route_nm, great_circle_points
+)
+
+ROUTES = {
+    'LAX-JFK': ({'lat': 33.94, 'lon': -118.41}, {'lat': 40.64, 'lon': -73.78}),
+    'SEA-SFO': ({'lat': 47.45, 'lon': -122.31}, {'lat': 37.62, 'lon': -122.38}),
+    # Crosses the antimeridian
+    'NRT-ANC': ({'lat': 35.77, 'lon': 140.39}, {'lat': 61.17, 'lon': -149.99}),
+    # Passes close to the pole
+    'JFK-HKG': ({'lat': 40.64, 'lon': -73.78}, {'lat': 22.31, 'lon': 113.91}),
+}
+
+@pytest.fixture(scope='module')
+def reports():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    return pd.DataFrame({
+        # Uniform on the sphere, so polar cells are exercised too
+        'latitude': np.degrees(np.arcsin(rng.uniform(-1, 1, n))),
+        'longitude': rng.uniform(-180, 180, n),
+        'altitude': rng.integers(0, 450, n) * 100.0,
+    })
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_NM
+
+@pytest.mark.parametrize('route', list(ROUTES))
+@pytest.mark.parametrize('width_nm', [25, 100, 300])
+def test_index_matches_full_scan(reports, route, width_nm):
+    start, end = ROUTES[route]
+    for cell_deg in (0.5, 1.0, 5.0):
+        index = PirepGridIndex(reports['latitude'], reports['longitude'], cell_deg=cell_deg)
+        found = corridor_query(index, reports, start, end, width_nm)
+
+        distance = distance_to_route_nm(reports['latitude'].to_numpy(), reports['longitude'].to_numpy(), start, end)
+        assert found.index.tolist() == reports.index[distance <= width_nm].tolist()
+        np.testing.assert_allclose(found['route_distance_nm'], distance[distance <= width_nm])
+
+def test_altitude_band_matches_full_scan(reports):
+    start, end = ROUTES['LAX-JFK']
+    index = PirepGridIndex(reports['latitude'], reports['longitude'])
+    found = corridor_query(index, reports, start, end, 100, altitude_range=(20000, 30000))
+
+    distance = distance_to_route_nm(reports['latitude'].to_numpy(), reports['longitude'].to_numpy(), start, end)
+    # The band is half-open, as on the filter cube
+    expected = reports.index[(distance <= 100) & (reports['altitude'] >= 20000) & (reports['altitude'] < 30000)]
+    assert found.index.tolist() == expected.tolist()
+
+@pytest.mark.parametrize('route', list(ROUTES))
+def test_distance_matches_dense_route_sampling(reports, route):
+    start, end = ROUTES[route]
+    sample = reports.sample(300, random_state=1)
+    lats, lons = great_circle_points(start, end, n=20_000)
+
+    nearest = haversine_nm(sample['latitude'].to_numpy()[:, None], sample['longitude'].to_numpy()[:, None],
+                           lats[None, :], lons[None, :]).min(axis=1)
+    distance = distance_to_route_nm(sample['latitude'].to_numpy(), sample['longitude'].to_numpy(), start, end)
+    # Sampling overestimates by at most half the spacing between route points
+    np.testing.assert_allclose(distance, nearest, atol=1.0)
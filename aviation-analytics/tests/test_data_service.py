@@ -0,0 +1,42 @@
+import os
+
+import pandas as pd
+
+import pytest
+
+import data_service
+from data_service import get_dataset, get_dataset_with_version, register_dataset
+
+@pytest.fixture(autouse=True)
+def isolated_registry(tmp_path, monkeypatch):
+    # Test datasets stay out of the process-wide registry and the real Arrow cache
+    monkeypatch.setattr(data_service, '_LOADERS', {})
+    monkeypatch.setattr(data_service, '_DATASETS', {})
+    monkeypatch.setattr(data_service, 'ARROW_CACHE_DIR', tmp_path / "_arrow_cache")
+
+def test_version_follows_source_rewrites(tmp_path):
+    source = tmp_path / "reports.csv"
+    pd.DataFrame({'latitude': [40.0, 41.0]}).to_csv(source, index=False)
+    register_dataset('test_reports', lambda: pd.read_csv(source), [source])
+
+    df, version = get_dataset_with_version('test_reports')
+    assert len(df) == 2
+    assert get_dataset_with_version('test_reports') == (df, version)
+    assert get_dataset('test_reports') is df
+
+    # A pipeline rerun rewrites the source; anything keyed on the old version must be rebuilt
+    pd.DataFrame({'latitude': [40.0]}).to_csv(source, index=False)
+    os.utime(source, (version + 10, version + 10))
+    reloaded, new_version = get_dataset_with_version('test_reports')
+    assert new_version == version + 10
+    assert len(reloaded) == 1
+
+def test_missing_source_is_not_kept(tmp_path):
+    source = tmp_path / "late.csv"
+    register_dataset('test_late', lambda: pd.read_csv(source) if source.exists() else pd.DataFrame(), [source])
+
+    df, version = get_dataset_with_version('test_late')
+    assert df.empty and version is None
+
+    pd.DataFrame({'latitude': [40.0]}).to_csv(source, index=False)
+    assert len(get_dataset('test_late')) == 1
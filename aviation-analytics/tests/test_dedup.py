@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import PIREP_KEY_COLUMNS, PirepDeduplicator
+from pirep_parser import normalize_reports
+
+def make_raw_chunk(n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    # Hours in time order, a few reports each, drawn from a small pool so duplicates are common
+    hours = np.sort(rng.integers(0, 72, n_rows))
+    valid = pd.Timestamp(2020, 1, 1) + pd.to_timedelta(hours, unit='h') + pd.to_timedelta(rng.integers(0, 2, n_rows) * 30, unit='min')
+    remarks = np.array(["/RM ZFW AWC-WEB", "/RM ZFW AWC-WEB:", "/rm  zfw awc-web.", "/RM (AKFSS)", "/RM(AKFSS"])
+    return pd.DataFrame({
+        'VALID': valid.strftime('%Y%m%d%H%M'),
+        'AIRCRAFT': rng.choice(['B737', 'A320'], n_rows),
+        'FL': rng.choice([100, 350], n_rows),
+        'LAT': rng.choice([40.0, 41.5], n_rows),
+        'LON': -100.0,
+        'TURBULENCE': 'MOD',
+        'REPORT': "ABC UA /OV ABC /TB MOD " + pd.Series(rng.choice(remarks, n_rows)),
+    })
+
+def reference_dedup(df):
+    keys = df[PIREP_KEY_COLUMNS].assign(REPORT=normalize_reports(df['REPORT']))
+    return df[~keys.duplicated()]
+
+def test_streaming_matches_drop_duplicates():
+    df = make_raw_chunk()
+    dedup = PirepDeduplicator()
+    # Uneven chunks so duplicates of one hour land on both sides of a boundary
+    bounds = [0, 7, 1000, 1001, 2600, 4999, len(df)]
+    kept = pd.concat([dedup.filter(df.iloc[start:end]) for start, end in zip(bounds, bounds[1:])])
+
+    expected = reference_dedup(df)
+    assert len(expected) < len(df) / 2
+    pd.testing.assert_frame_equal(kept, expected)
+    assert dedup.removed == len(df) - len(expected)
+
+def test_old_windows_are_evicted():
+    df = make_raw_chunk()
+    dedup = PirepDeduplicator(max_windows=2)
+    dedup.filter(df)
+    assert len(dedup.windows) == 2
+
+def test_normalize_reports():
+    reports = pd.Series([
+        "ABC UA /OV ABC /RM ZFW AWC-WEB:",
+        "abc ua /ov abc /rm zfw awc-web",
+        "ABC UA /OV ABC /RM(AKFSS)",
+        "ABC UA /OV ABC /RM (AKFSS",
+        'ABC UA /OV ABC /RM "TEST".',
+        None,
+    ], index=range(10, 16))
+    normalized = normalize_reports(reports)
+    assert normalized.index.tolist() == list(range(10, 16))
+    assert normalized.iloc[:5].tolist() == [
+        "ABCUA/OVABC/RMZFWAWC-WEB", "ABCUA/OVABC/RMZFWAWC-WEB",
+        "ABCUA/OVABC/RM(AKFSS", "ABCUA/OVABC/RM(AKFSS", 'ABCUA/OVABC/RM"TEST',
+    ]
+    assert normalized.iloc[5] is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from delay_causes import DELAY_CAUSE_FACTORS, build_delay_summary, load_delay_causes, load_delay_summary
+
+def write_delay_causes(path, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for year in (2021, 2022, 2023):
+        for month in range(1, 13):
+            for carrier in ('AA', 'DL', 'UA'):
+                for airport in ('LAX', 'SFO', 'JFK', 'ORD'):
+                    flights = float(rng.integers(0, 400))
+                    minutes = rng.uniform(0, 2000, len(DELAY_CAUSE_FACTORS)).round(2)
+                    rows.append({
+                        'year': year, 'month': month, 'carrier': carrier, 'carrier_name': f"{carrier} Airlines",
+                        'airport': airport, 'airport_name': f"{airport} International",
+                        'arr_flights': flights, 'arr_del15': float(rng.integers(0, flights + 1)),
+                        **dict(zip(DELAY_CAUSE_FACTORS, minutes)),
+                    })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+def test_factor_importance_matches_linear_regression(tmp_path):
+    write_delay_causes(tmp_path / "delay.csv")
+    df = load_delay_causes(tmp_path / "delay.csv", tmp_path / "cache")
+    summary = build_delay_summary(df)
+
+    monthly = df.groupby('timestamp')[DELAY_CAUSE_FACTORS + ['delay_rate']].mean()
+    reference = LinearRegression().fit(monthly[DELAY_CAUSE_FACTORS], monthly['delay_rate'])
+    np.testing.assert_allclose(summary['factor_importance']['Coefficient'], reference.coef_, rtol=1e-6, atol=1e-12)
+
+def test_saved_summary_matches_groupbys(tmp_path):
+    write_delay_causes(tmp_path / "delay.csv")
+    df = load_delay_causes(tmp_path / "delay.csv", tmp_path / "cache")
+    summary = load_delay_summary(tmp_path / "delay.csv", tmp_path / "cache")
+    assert len(list((tmp_path / "cache").glob("*_summary.json"))) == 1
+
+    assert summary['totals']['arr_flights'] == df['arr_flights'].astype('float64').sum()
+    carrier = df.groupby('carrier', observed=True)['delay_rate'].mean().sort_values()
+    assert summary['carrier_delay']['carrier'].tolist() == carrier.index.tolist()
+    np.testing.assert_allclose(summary['carrier_delay']['delay_rate'], carrier.to_numpy())
+
+    trend = df.groupby('timestamp')['delay_rate'].mean()
+    pd.testing.assert_series_equal(summary['monthly_trend'].set_index('timestamp')['delay_rate'],
+                                   trend.astype('float64'), check_index_type=False, check_freq=False)
+    pd.testing.assert_frame_equal(summary['factor_importance'], build_delay_summary(df)['factor_importance'])
+
+def test_missing_file_has_no_summary(tmp_path):
+    assert load_delay_summary(tmp_path / "missing.csv", tmp_path / "cache") is None
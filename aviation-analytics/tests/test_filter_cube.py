@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from turbulence_utils import (
+    CUBE_COLUMNS, bin_reports, build_filter_cube, cube_altitude_box_stats, cube_monthly_counts, cube_summary,
+    in_altitude_band, slice_filter_cube
+)
+
+@pytest.fixture(scope='module')
+def reports():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp(2020, 1, 1) + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit='h'),
+        'latitude': rng.uniform(20, 55, n),
+        'longitude': rng.uniform(-130, -65, n),
+        # Flight levels, so many reports sit exactly on a bin edge
+        'altitude': rng.integers(0, 450, n) * 100.0,
+        'turbulence_intensity': rng.choice(['Light', 'Moderate', 'Severe'], n),
+    })
+
+@pytest.mark.parametrize('altitude_range', [(20000, 30000), (0, 45000), (20500, 30999), (31000, 31000)])
+def test_cube_slice_matches_raw_filter(reports, altitude_range):
+    intensities = ['Moderate', 'Severe']
+    cube_slice = slice_filter_cube(build_filter_cube(reports), intensities, altitude_range)
+    raw = reports[reports['turbulence_intensity'].isin(intensities) & in_altitude_band(reports['altitude'], altitude_range)]
+
+    summary = cube_summary(cube_slice)
+    assert summary['total'] == len(raw)
+    assert summary['severe'] == (raw['turbulence_intensity'] == 'Severe').sum()
+    if len(raw):
+        assert summary['avg_altitude'] == pytest.approx(raw['altitude'].mean())
+
+def test_band_excludes_the_top_edge(reports):
+    band = in_altitude_band(reports['altitude'], (20000, 30000))
+    assert reports.loc[band, 'altitude'].max() == 29900
+    assert reports.loc[band, 'altitude'].min() == 20000
+
+def test_empty_cube_gives_empty_results():
+    cube_slice = slice_filter_cube(pd.DataFrame(columns=CUBE_COLUMNS), ['Severe'], (20000, 30000))
+    assert cube_summary(cube_slice)['total'] == 0
+    assert cube_monthly_counts(cube_slice).empty
+    assert cube_altitude_box_stats(cube_slice).empty
+    cells = cube_slice.rename(columns={'cell_lat': 'latitude', 'cell_lon': 'longitude'})
+    assert bin_reports(cells, 1.0, weight_col='count').empty
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import process_turbulence_data_streaming
+from turbulence_store import has_source_partitions, load_manifest, read_turbulence
+from turbulence_utils import CUBE_KEYS, build_filter_cube, ensure_filter_cube
+
+def write_raw_pireps(path, n_rows=200, month=1, seed=0):
+    rng = np.random.default_rng(seed)
+    valid = pd.Timestamp(2020, month, 1) + pd.to_timedelta(rng.integers(0, 20 * 24 * 60, n_rows), unit='min')
+    pd.DataFrame({
+        'VALID': valid.strftime('%Y%m%d%H%M'),
+        'AIRCRAFT': 'B737',
+        'LAT': rng.uniform(20, 55, n_rows).round(3),
+        'LON': rng.uniform(-130, -65, n_rows).round(3),
+        'FL': rng.integers(10, 450, n_rows) * 100,
+        'TURBULENCE': rng.choice(['LGT CHOP', 'MOD', 'NEG', 'SEV'], n_rows),
+        'ICING': rng.choice(['', 'LGT RIME', 'MOD CLR'], n_rows),
+        'REPORT': [f"ABC UA /OV ABC /TM 0000 /FL{i % 400:03d} /TP B737 /TB MOD" for i in range(n_rows)],
+    }).to_csv(path, index=False)
+
+def stored_sources(store_dir):
+    return sorted({p.name.rsplit('-', 1)[0] for p in store_dir.glob("year=*/month=*/*.parquet")})
+
+def run(raw_dir, store_dir, **kwargs):
+    return process_turbulence_data_streaming(raw_dir, store_dir, max_in_flight=2,
+                                             icing_store_dir=store_dir.parent / "icing", **kwargs)
+
+def test_deleted_raw_files_are_pruned(tmp_path):
+    raw_dir, store_dir = tmp_path / "raw", tmp_path / "store"
+    raw_dir.mkdir()
+    write_raw_pireps(raw_dir / "pireps_202001.csv", month=1)
+    # '[' would make an unescaped glob match nothing, leaving stale partitions behind
+    write_raw_pireps(raw_dir / "pireps_[copy].csv", month=2, seed=1)
+
+    run(raw_dir, store_dir)
+    assert stored_sources(store_dir) == ["pireps_202001", "pireps_[copy]"]
+
+    (raw_dir / "pireps_[copy].csv").unlink()
+    assert run(raw_dir, store_dir) == 0
+    assert stored_sources(store_dir) == ["pireps_202001"]
+    assert list(load_manifest(store_dir)) == [str(raw_dir / "pireps_202001.csv")]
+    assert read_turbulence(columns=['timestamp'], store_dir=store_dir)['timestamp'].dt.month.unique().tolist() == [1]
+
+def test_sources_sharing_a_name_prefix_are_kept_apart(tmp_path):
+    raw_dir, store_dir = tmp_path / "raw", tmp_path / "store"
+    raw_dir.mkdir()
+    # Partitions of pireps_2020 are pireps_2020-<i>.parquet, a prefix of pireps_2020-01-<i>.parquet
+    write_raw_pireps(raw_dir / "pireps_2020.csv", month=1)
+    write_raw_pireps(raw_dir / "pireps_2020-01.csv", month=1, seed=1)
+    run(raw_dir, store_dir)
+    assert stored_sources(store_dir) == ["pireps_2020", "pireps_2020-01"]
+    assert has_source_partitions("pireps_2020", store_dir)
+
+    # Rewriting and then deleting the shorter name must leave the other source alone
+    write_raw_pireps(raw_dir / "pireps_2020.csv", month=1, seed=2)
+    assert run(raw_dir, store_dir) == 200
+    assert stored_sources(store_dir) == ["pireps_2020", "pireps_2020-01"]
+    (raw_dir / "pireps_2020.csv").unlink()
+    run(raw_dir, store_dir)
+    assert stored_sources(store_dir) == ["pireps_2020-01"]
+    assert not has_source_partitions("pireps_2020", store_dir)
+    assert len(read_turbulence(columns=['timestamp'], store_dir=store_dir)) == 200
+
+def test_full_refresh_rebuilds_the_store(tmp_path):
+    raw_dir, store_dir = tmp_path / "raw", tmp_path / "store"
+    raw_dir.mkdir()
+    write_raw_pireps(raw_dir / "pireps_202001.csv")
+    first = run(raw_dir, store_dir)
+
+    # A partition from an unknown source is not covered by the manifest, so only a refresh drops it
+    stray = store_dir / "year=2019" / "month=12" / "stray-0.parquet"
+    stray.parent.mkdir(parents=True)
+    stray.write_bytes(b'')
+
+    assert run(raw_dir, store_dir) == 0
+    assert run(raw_dir, store_dir, full_refresh=True) == first
+    assert not stray.exists()
+    assert len(read_turbulence(columns=['timestamp'], store_dir=store_dir)) == first
+
+def test_icing_store_follows_the_manifest(tmp_path):
+    raw_dir, store_dir, icing_dir = tmp_path / "raw", tmp_path / "store", tmp_path / "icing"
+    raw_dir.mkdir()
+    write_raw_pireps(raw_dir / "pireps_202001.csv", month=1)
+    write_raw_pireps(raw_dir / "pireps_202002.csv", month=2, seed=1)
+    run(raw_dir, store_dir)
+    assert stored_sources(icing_dir) == ["pireps_202001", "pireps_202002"]
+
+    # Deleting only the icing store makes every file stale again
+    for path in icing_dir.glob("year=*/month=*/*.parquet"):
+        path.unlink()
+    run(raw_dir, store_dir)
+    assert stored_sources(icing_dir) == ["pireps_202001", "pireps_202002"]
+
+    (raw_dir / "pireps_202002.csv").unlink()
+    run(raw_dir, store_dir)
+    assert stored_sources(icing_dir) == ["pireps_202001"]
+
+    stray = icing_dir / "year=2019" / "month=12" / "stray-0.parquet"
+    stray.parent.mkdir(parents=True)
+    stray.write_bytes(b'')
+    run(raw_dir, store_dir, full_refresh=True)
+    assert not stray.exists()
+    assert stored_sources(icing_dir) == ["pireps_202001"]
+
+def test_merged_cube_fragments_match_a_full_rebuild(tmp_path):
+    raw_dir, store_dir = tmp_path / "raw", tmp_path / "store"
+    raw_dir.mkdir()
+    for month in (1, 2, 3):
+        write_raw_pireps(raw_dir / f"pireps_2020{month:02d}.csv", n_rows=500, month=month, seed=month)
+    run(raw_dir, store_dir)
+    # Replace one source and drop another, so the merge sees rewritten and removed fragments
+    write_raw_pireps(raw_dir / "pireps_202001.csv", n_rows=300, month=1, seed=7)
+    (raw_dir / "pireps_202003.csv").unlink()
+    run(raw_dir, store_dir)
+
+    cube_path = tmp_path / "cube.parquet"
+    assert ensure_filter_cube(store_dir, cube_path)
+    assert not ensure_filter_cube(store_dir, cube_path)
+
+    columns = ['timestamp', 'latitude', 'longitude', 'altitude', 'turbulence_intensity']
+    expected = build_filter_cube(read_turbulence(columns=columns, store_dir=store_dir))
+    merged = pd.read_parquet(cube_path)
+    pd.testing.assert_frame_equal(merged.sort_values(CUBE_KEYS, ignore_index=True),
+                                  expected.sort_values(CUBE_KEYS, ignore_index=True), check_dtype=False)
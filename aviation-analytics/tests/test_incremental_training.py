@@ -0,0 +1,85 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from compact_model import CompactModel
+from incremental_training import train_turbulence_incremental
+from modeling import TURBULENCE_ENGINES, make_estimator, turbulence_feature_frame
+from turbulence_store import remove_source_partitions, write_turbulence_partitions
+
+def make_seasonal_reports(rows_per_month=1500, seed=0):
+    """
+    One year of reports whose label depends on month: high altitudes are rough in winter
+    and smooth in summer, so a model that ignores the month is right only half the time.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for month in range(1, 13):
+        n = rows_per_month
+        altitude = rng.uniform(0, 45000, n)
+        winter = month in (11, 12, 1, 2, 3)
+        rough = (altitude > 25000) == winter
+        labels = np.where(rough, 'Moderate', 'Light')
+        labels[rng.random(n) < 0.05] = 'None'
+        frames.append(pd.DataFrame({
+            'timestamp': pd.Timestamp(2020, month, 1) + pd.to_timedelta(rng.integers(0, 27 * 24, n), unit='h'),
+            'latitude': rng.uniform(20, 55, n),
+            'longitude': rng.uniform(-130, -65, n),
+            'altitude': altitude.round(),
+            'turbulence_intensity': labels,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def test_incremental_accuracy_matches_full_model(tmp_path):
+    df = make_seasonal_reports()
+    test = df.sample(frac=0.2, random_state=1)
+    train = df.drop(test.index)
+    write_turbulence_partitions(train, 'synthetic', tmp_path / "store")
+
+    model = train_turbulence_incremental(store_dir=tmp_path / "store", model_path=tmp_path / "turbulence_model.pkl")
+    classes = np.array(sorted(['Light', 'Moderate', 'None', 'Severe']))
+    X_test = turbulence_feature_frame(test).astype('float32')
+    y_test = np.searchsorted(classes, test['turbulence_intensity'])
+    incremental_accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    _, full = make_estimator(TURBULENCE_ENGINES, 'random_forest')
+    full.fit(turbulence_feature_frame(train).astype('float32'), np.searchsorted(classes, train['turbulence_intensity']))
+    full_accuracy = accuracy_score(y_test, full.predict(X_test))
+
+    assert incremental_accuracy > 0.85
+    assert incremental_accuracy >= full_accuracy - 0.03
+
+def test_month_weighted_compact_export_matches(tmp_path):
+    df = make_seasonal_reports(rows_per_month=300)
+    write_turbulence_partitions(df, 'synthetic', tmp_path / "store")
+    model = train_turbulence_incremental(store_dir=tmp_path / "store", model_path=tmp_path / "turbulence_model.pkl")
+    compact = CompactModel(tmp_path / "turbulence_model.npz")
+
+    X = turbulence_feature_frame(df.sample(500, random_state=2)).astype('float32')
+    np.testing.assert_allclose(compact.predict_proba(X), model.predict_proba(X), atol=1e-9)
+
+def test_update_rewrites_the_sidecar(tmp_path):
+    df = make_seasonal_reports(rows_per_month=200)
+    model_path = tmp_path / "turbulence_model.pkl"
+    # Left behind by a full fit; the partitioned model replaces both the model and its description
+    _, full = make_estimator(TURBULENCE_ENGINES, 'random_forest')
+    joblib.dump(full, model_path)
+    model_path.with_suffix('.json').write_text(json.dumps({'engine': 'random_forest'}))
+
+    months = df['timestamp'].dt.month
+    write_turbulence_partitions(df[months <= 3], 'first_quarter', tmp_path / "store")
+    write_turbulence_partitions(df[(months > 3) & (months <= 6)], 'second_quarter', tmp_path / "store")
+    train_turbulence_incremental(store_dir=tmp_path / "store", model_path=model_path)
+    sidecar = json.loads(model_path.with_suffix('.json').read_text())
+    assert sidecar['engine'] == 'partitioned_forest'
+    assert (sidecar['partitions'], sidecar['rows']) == (6, 1200)
+
+    # Dropping months without training any still refreshes the description
+    remove_source_partitions('second_quarter', tmp_path / "store")
+    model = train_turbulence_incremental(store_dir=tmp_path / "store", model_path=model_path)
+    sidecar = json.loads(model_path.with_suffix('.json').read_text())
+    assert len(model.members) == sidecar['partitions'] == 3
+    assert sidecar['predict_single_ms'] > 0
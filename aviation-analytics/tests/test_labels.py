@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks import SAMPLE_TURBULENCE
+from data_preprocessing import standardize_turbulence, standardize_turbulence_series
+
+# Odd casing, padding and near-misses beyond the raw strings in the 2020 files
+EXTRA_TURBULENCE = ['mod chop', ' lgt ', 'Light', 'sev-extrm', 'NEGATIVE', 'CHOP', '', 'UNKN', np.nan, 12]
+
+def test_vectorized_labels_match_row_wise():
+    raw = pd.Series(SAMPLE_TURBULENCE + EXTRA_TURBULENCE, dtype=object)
+    raw = raw.sample(frac=20, replace=True, random_state=0)
+    expected = raw.apply(standardize_turbulence)
+
+    pd.testing.assert_series_equal(standardize_turbulence_series(raw), expected)
+
+def test_categorical_input_matches_row_wise():
+    raw = pd.Series(SAMPLE_TURBULENCE * 3, dtype=object)
+    expected = raw.apply(standardize_turbulence)
+
+    pd.testing.assert_series_equal(standardize_turbulence_series(raw.astype('category')), expected)
+
+def test_missing_values_stay_missing():
+    labels = standardize_turbulence_series(pd.Series([None, np.nan, 'MOD'], index=[5, 6, 7]))
+    assert labels.index.tolist() == [5, 6, 7]
+    assert labels.isna().tolist() == [True, True, False]
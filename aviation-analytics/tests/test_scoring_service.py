@@ -0,0 +1,81 @@
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from scoring import TURBULENCE_FEATURES
+from scoring_service import MicroBatcher, make_server
+
+ROW = {'altitude': 30000, 'latitude': 34.0, 'longitude': -118.0, 'month': 1, 'hour': 12}
+
+@pytest.fixture(scope='module')
+def trained():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 1, (300, 5)) * [45000, 35, 65, 11, 23] + [0, 20, -130, 1, 0],
+                     columns=TURBULENCE_FEATURES)
+    le = LabelEncoder().fit(['Light', 'Moderate', 'None', 'Severe'])
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, rng.integers(0, 4, len(X))), le
+
+@pytest.fixture(scope='module')
+def service(trained):
+    server = make_server(*trained, port=0, max_wait_ms=50)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def post(url, body, content_type='application/json'):
+    request = urllib.request.Request(url, data=body.encode(), headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+def test_batch_scoring_error_is_a_json_400(service):
+    # Infinity parses as a float but is rejected before it reaches the model
+    status, body = post(f"{service}/predict/batch", json.dumps([ROW, {**ROW, 'altitude': float('inf')}]))
+    assert status == 400
+    assert json.loads(body)['error'] == "Non-finite values in: altitude"
+
+def test_malformed_csv_batch_is_a_json_400(service):
+    csv = "altitude,latitude,longitude,month,hour\n30000,34,-118,1,12\n30000,34,-118,1,12,7,9\n"
+    status, body = post(f"{service}/predict/batch", csv, 'text/csv')
+    assert status == 400
+    assert 'error' in json.loads(body)
+
+def test_malformed_content_length_is_a_json_400(service):
+    connection = http.client.HTTPConnection(service.removeprefix("http://"))
+    connection.putrequest('POST', '/predict')
+    connection.putheader('Content-Length', 'abc')
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    assert 'error' in json.loads(response.read())
+    connection.close()
+
+@pytest.mark.parametrize('value', [float('inf'), float('-inf'), None])
+def test_non_finite_row_is_rejected_before_scoring(service, value):
+    status, body = post(f"{service}/predict", json.dumps({**ROW, 'altitude': value}))
+    assert status == 400
+    assert json.loads(body)['error'] == "Non-finite values in: altitude"
+
+def test_bad_row_does_not_fail_its_micro_batch(trained):
+    # Rows that slip past request validation still only fail their own future
+    batcher = MicroBatcher(*trained, max_wait_ms=200)
+    rows = [list(ROW.values())] * 7 + [[float('inf'), 34.0, -118.0, 1, 12]]
+    futures = [batcher.submit(row) for row in rows]
+    assert [f.exception(timeout=5) is None for f in futures] == [True] * 7 + [False]
+    assert batcher.batches == 1
+
+def test_batch_scores_valid_rows(service):
+    status, body = post(f"{service}/predict/batch", json.dumps([ROW, ROW]))
+    assert status == 200
+    assert [set(r) >= {'label', 'risk_score'} for r in json.loads(body)] == [True, True]
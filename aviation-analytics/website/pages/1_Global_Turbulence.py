@@ -1,32 +1,33 @@
 
 import streamlit as st
-import pandas as pd
 import pydeck as pdk
 import plotly.express as px
-from pathlib import Path
+import plotly.graph_objects as go
 import sys
 import os
 
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from data_service import get_dataset, get_dataset_with_version
+from turbulence_utils import (
+    PirepGridIndex, corridor_query, great_circle_points, bin_reports, cell_size_for_zoom,
+    CUBE_ALT_BIN_FT, CUBE_CELL_DEG, in_altitude_band, slice_filter_cube, cube_summary, cube_monthly_counts, cube_altitude_box_stats
+)
 
 st.set_page_config(page_title="Global Turbulence", page_icon="✈️", layout="wide")
 apply_theme()
 render_sidebar()
 render_header("Global Turbulence Analytics", "fa-solid fa-earth-americas")
 
-# Paths
-PROCESSED_DIR = Path("aviation-analytics/data/processed")
+# Shared read-only frames, loaded once per server process for every session
+df, df_version = get_dataset_with_version('turbulence')
 
-@st.cache_data
-def load_data():
-    path = PROCESSED_DIR / "turbulence_cleaned.csv.gz"
-    if path.exists():
-        return pd.read_csv(path, compression='gzip') 
-    return pd.DataFrame()
-
-df = load_data()
+@st.cache_resource(max_entries=1)
+def load_spatial_index(version, _df):
+    # Built once per loaded frame over all reports; route queries only visit cells near the path.
+    # Keyed on the dataset version, so a reloaded frame never meets an index of the previous one
+    return PirepGridIndex(_df['latitude'].to_numpy(), _df['longitude'].to_numpy())
 
 if not df.empty:
     # Sidebar Filters
@@ -37,36 +38,44 @@ if not df.empty:
         default=['Severe', 'Moderate']
     )
     
-    min_alt, max_alt = int(df['altitude'].min()), int(df['altitude'].max())
-    altitude_range = st.sidebar.slider("Altitude (ft)", min_alt, max_alt, (20000, 40000))
+    # Whole cube bins, with the upper end exclusive; the top bound sits past the highest report
+    min_alt = int(df['altitude'].min()) // CUBE_ALT_BIN_FT * CUBE_ALT_BIN_FT
+    max_alt = (int(df['altitude'].max()) // CUBE_ALT_BIN_FT + 1) * CUBE_ALT_BIN_FT
+    altitude_range = st.sidebar.slider("Altitude (ft)", min_alt, max_alt, (20000, 40000), step=CUBE_ALT_BIN_FT)
     
-    # Filter Data
-    filtered_df = df[
-        (df['turbulence_intensity'].isin(intensity_filter)) &
-        (df['altitude'].between(altitude_range[0], altitude_range[1]))
-    ].copy()
+    # Cards, box plot and trend are answered from the pre-aggregated cube
+    cube_slice = slice_filter_cube(get_dataset('turbulence_cube'), intensity_filter, altitude_range)
+    summary = cube_summary(cube_slice)
     
     # Metrics
     c1, c2, c3 = st.columns(3)
-    with c1: render_metric_card("Total Reports", f"{len(filtered_df):,}")
-    with c2: render_metric_card("Severe Events", f"{len(filtered_df[filtered_df['turbulence_intensity']=='Severe']):,}")
-    with c3: render_metric_card("Avg Altitude", f"{filtered_df['altitude'].mean():.0f} ft")
+    with c1: render_metric_card("Total Reports", f"{summary['total']:,}")
+    with c2: render_metric_card("Severe Events", f"{summary['severe']:,}")
+    with c3: render_metric_card("Avg Altitude", f"{summary['avg_altitude']:.0f} ft")
     
     # Plotly Density Mapbox
     st.subheader("Global Turbulence Heatmap")
     
-    # Sampling for Performance (2D is lighter, can handle more, but keep safe)
-    if len(filtered_df) > 20000:
-        st.caption(f"⚠️ Displaying a random sample of 20,000 points (out of {len(filtered_df):,}) for performance.")
-        map_df = filtered_df.sample(20000)
+    # Every filtered report is binned server-side; only the cell table is sent to the browser
+    map_zoom = st.select_slider("Map Detail", options=list(range(2, 9)), value=4)
+    map_cell_deg = cell_size_for_zoom(map_zoom)
+    if map_cell_deg >= CUBE_CELL_DEG:
+        # Coarser than the cube's cells, so re-bin the cube instead of the raw reports
+        cube_cells = cube_slice.rename(columns={'cell_lat': 'latitude', 'cell_lon': 'longitude'})
+        map_df = bin_reports(cube_cells, map_cell_deg, weight_col='count')
     else:
-        map_df = filtered_df
+        map_df = bin_reports(df[
+            (df['turbulence_intensity'].isin(intensity_filter)) &
+            in_altitude_band(df['altitude'], altitude_range)
+        ], map_cell_deg)
+    st.caption(f"{summary['total']:,} reports aggregated into {len(map_df):,} cells.")
 
     fig_map = px.density_mapbox(
         map_df, 
         lat='latitude', 
         lon='longitude', 
-        z=None, # Just density of points
+        z='count', # Report count per cell
+        hover_data={'count': True, 'severe': True, 'mean_severity': ':.2f'},
         radius=10,
         center=dict(lat=37, lon=-95), 
         zoom=3,
@@ -80,20 +89,25 @@ if not df.empty:
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("Altitude vs Intensity Risk")
-        # Box Plot
-        fig_box = px.box(filtered_df, x='turbulence_intensity', y='altitude', 
-                         color='turbulence_intensity',
-                         color_discrete_map={'Severe': '#ff4b4b', 'Moderate': '#ffa421', 'Light': '#21c354'},
-                         template="plotly_dark",
-                         title="Safe vs Risky Flight Levels")
+        # Box Plot from precomputed quartiles
+        box_stats = cube_altitude_box_stats(cube_slice)
+        box_colors = {'Severe': '#ff4b4b', 'Moderate': '#ffa421', 'Light': '#21c354'}
+        fig_box = go.Figure()
+        for _, row in box_stats.iterrows():
+            fig_box.add_trace(go.Box(
+                name=row['turbulence_intensity'], x=[row['turbulence_intensity']],
+                q1=[row['q1']], median=[row['median']], q3=[row['q3']],
+                lowerfence=[row['lowerfence']], upperfence=[row['upperfence']],
+                marker_color=box_colors.get(row['turbulence_intensity'])
+            ))
+        fig_box.update_layout(template="plotly_dark", title="Safe vs Risky Flight Levels",
+                              yaxis_title="altitude", xaxis_title="turbulence_intensity")
         fig_box.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
         st.plotly_chart(fig_box, use_container_width=True)
         
     with c2:
         st.subheader("Seasonal Trends")
-        # Ensure timestamp is datetime
-        filtered_df['timestamp'] = pd.to_datetime(filtered_df['timestamp'])
-        monthly_counts = filtered_df.resample('ME', on='timestamp').size().reset_index(name='count')
+        monthly_counts = cube_monthly_counts(cube_slice)
         fig_trend = px.line(monthly_counts, x='timestamp', y='count', template="plotly_dark", markers=True,
                             title="Turbulence Events over Time")
         fig_trend.update_traces(line_color='#58a6ff')
@@ -117,23 +131,18 @@ if not df.empty:
         "BOS": {"lat": 42.3656, "lon": -71.0096}
     }
     
-    rc1, rc2 = st.columns(2)
+    rc1, rc2, rc3 = st.columns(3)
     origin = rc1.selectbox("Origin", list(AIRPORT_COORDS.keys()), index=0)
     dest = rc2.selectbox("Destination", list(AIRPORT_COORDS.keys()), index=1)
+    corridor_nm = rc3.slider("Corridor Width (nm)", 10, 200, 50, step=10)
     
     if origin != dest:
-        # Simple linear interpolation for route path
         start = AIRPORT_COORDS[origin]
         end = AIRPORT_COORDS[dest]
         
-        # Filter data within a bounding box of the route + buffer
-        lat_min, lat_max = min(start['lat'], end['lat']) - 2, max(start['lat'], end['lat']) + 2
-        lon_min, lon_max = min(start['lon'], end['lon']) - 2, max(start['lon'], end['lon']) + 2
-        
-        route_df = filtered_df[
-            (filtered_df['latitude'].between(lat_min, lat_max)) & 
-            (filtered_df['longitude'].between(lon_min, lon_max))
-        ]
+        # Reports within the corridor around the great-circle route, in the selected altitude band
+        route_df = corridor_query(load_spatial_index(df_version, df), df, start, end, corridor_nm, altitude_range)
+        route_df = route_df[route_df['turbulence_intensity'].isin(intensity_filter)]
         
         if not route_df.empty:
             # Visualize turbulence along the approximate path
@@ -142,11 +151,10 @@ if not df.empty:
                                    title=f"Turbulence Reports along {origin} -> {dest} Corridor",
                                    template="plotly_dark")
             
-            # Add route line
-            fig_route.add_shape(type="line",
-                x0=start['lon'], y0=start['lat'], x1=end['lon'], y1=end['lat'],
-                line=dict(color="white", width=2, dash="dash"),
-            )
+            # Add great-circle route line
+            path_lats, path_lons = great_circle_points(start, end)
+            fig_route.add_scatter(x=path_lons, y=path_lats, mode="lines", name="Route",
+                                  line=dict(color="white", width=2, dash="dash"))
             fig_route.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
             st.plotly_chart(fig_route, use_container_width=True)
         else:
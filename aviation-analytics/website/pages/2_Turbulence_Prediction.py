@@ -1,7 +1,6 @@
 
 import streamlit as st
 import pandas as pd
-import joblib
 from pathlib import Path
 import sys
 import os
@@ -11,6 +10,8 @@ import plotly.express as px
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from scoring import load_turbulence_model, predict_turbulence_batch
+from risk_grid import RISK_GRID_PATH, TurbulenceRiskGrid
 
 st.set_page_config(page_title="Turbulence Prediction", page_icon="🔮", layout="wide")
 apply_theme()
@@ -21,14 +22,20 @@ MODELS_DIR = Path("aviation-analytics/models")
 
 @st.cache_resource
 def load_model():
-    model_path = MODELS_DIR / "turbulence_model.pkl"
-    le_path = MODELS_DIR / "turbulence_le.pkl"
-    if model_path.exists() and le_path.exists():
-        return joblib.load(model_path), joblib.load(le_path)
-    return None, None
+    # Compact NumPy export when available; the pickles need scikit-learn to load
+    return load_turbulence_model(MODELS_DIR)
 
 model, le = load_model()
 
+@st.cache_resource
+def load_risk_grid():
+    # Memory-mapped, so the grid is shared across sessions and paged in on demand
+    if RISK_GRID_PATH.exists():
+        return TurbulenceRiskGrid(RISK_GRID_PATH)
+    return None
+
+risk_grid = load_risk_grid()
+
 # Initialize Session State
 if 'turb_pred' not in st.session_state:
     st.session_state.turb_pred = None
@@ -51,15 +58,12 @@ with col1:
         submitted = st.form_submit_button("Predict Risk", use_container_width=True)
         
         if submitted and model:
-            input_data = pd.DataFrame([[alt, lat, lon, month, hour]], 
-                                      columns=['altitude', 'latitude', 'longitude', 'month', 'hour'])
-            pred_encoded = model.predict(input_data)[0]
-            pred_label = le.inverse_transform([pred_encoded])[0]
-            pred_proba = model.predict_proba(input_data)[0]
+            # Label and probabilities come from one predict_proba call
+            pred = predict_turbulence_batch(model, le, [[alt, lat, lon, month, hour]]).iloc[0]
             
             st.session_state.turb_pred = {
-                "label": pred_label,
-                "proba": dict(zip(le.classes_, pred_proba)),
+                "label": pred["label"],
+                "proba": {c: pred[c] for c in le.classes_},
                 "inputs": {"alt": alt, "lat": lat, "lon": lon, "month": month, "hour": hour}
             }
 
@@ -219,23 +223,11 @@ if st.session_state.turb_pred:
     alt, lat, lon, month, hour = inputs['alt'], inputs['lat'], inputs['lon'], inputs['month'], inputs['hour']
     
     future_hours = [(hour + i) % 24 for i in range(12)]
-    future_data = []
     
-    for h in future_hours:
-        row = pd.DataFrame([[alt, lat, lon, month, h]], 
-                           columns=['altitude', 'latitude', 'longitude', 'month', 'hour'])
-        p_proba = model.predict_proba(row)[0]
-        classes = list(le.classes_)
-        sev_idx = classes.index('Severe') if 'Severe' in classes else -1
-        mod_idx = classes.index('Moderate') if 'Moderate' in classes else -1
-        
-        risk_score = 0
-        if sev_idx != -1: risk_score += p_proba[sev_idx] * 1.0
-        if mod_idx != -1: risk_score += p_proba[mod_idx] * 0.5
-        
-        future_data.append({'Hour (UTC)': h, 'Risk Score': risk_score})
-        
-    forecast_df = pd.DataFrame(future_data)
+    # All 12 hours are scored in a single batch
+    future_rows = [[alt, lat, lon, month, h] for h in future_hours]
+    forecast = predict_turbulence_batch(model, le, future_rows)
+    forecast_df = pd.DataFrame({'Hour (UTC)': future_hours, 'Risk Score': forecast['risk_score'].to_numpy()})
     
     fig_forecast = px.line(forecast_df, x='Hour (UTC)', y='Risk Score', markers=True,
                            title="Projected Turbulence Risk", template="plotly_dark")
@@ -243,3 +235,21 @@ if st.session_state.turb_pred:
     fig_forecast.add_hrect(y0=0.5, y1=1.0, line_width=0, fillcolor="red", opacity=0.2, annotation_text="High Risk")
     fig_forecast.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
     st.plotly_chart(fig_forecast, use_container_width=True)
+
+    # Row 4: Precomputed risk map
+    if risk_grid is not None:
+        st.subheader(f"Risk Map at {alt:,} ft")
+        map_df = risk_grid.risk_map(alt, month, hour)
+        fig_risk = px.density_mapbox(
+            map_df,
+            lat='latitude',
+            lon='longitude',
+            z='risk_score',
+            radius=25,
+            center=dict(lat=lat, lon=lon),
+            zoom=3,
+            range_color=(0, 1),
+            mapbox_style="carto-darkmatter"
+        )
+        fig_risk.update_layout(margin={"r":0,"t":0,"l":0,"b":0}, paper_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig_risk, use_container_width=True)
@@ -2,29 +2,35 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
 import sys
 import os
 
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from aei_utils import rollup_cube
+from data_service import get_dataset
 
 st.set_page_config(page_title="Airport Efficiency", page_icon="🛫", layout="wide")
 apply_theme()
 render_sidebar()
 render_header("Airport Efficiency Index (AEI)", "fa-solid fa-plane-departure")
 
-PROCESSED_DIR = Path("aviation-analytics/data/processed")
+# Shared read-only frame, loaded once per server process for every session
+cube = get_dataset('aei_cube')
 
-@st.cache_data
-def load_aei_data():
-    path = PROCESSED_DIR / "airport_efficiency.csv.gz"
-    if path.exists():
-        return pd.read_csv(path, compression='gzip')
-    return pd.DataFrame()
-
-df = load_aei_data()
+if not cube.empty:
+    # Slices are rolled up from the AEI cube, no raw BTS data is needed
+    st.sidebar.header("Filters")
+    years = st.sidebar.multiselect("Year", sorted(cube['YEAR'].unique()), default=sorted(cube['YEAR'].unique()))
+    months = st.sidebar.multiselect("Month", list(range(1, 13)), default=list(range(1, 13)))
+    carriers = st.sidebar.multiselect("Carrier", sorted(cube['REPORTING_AIRLINE'].unique()))
+    min_flights = st.sidebar.number_input("Min Flights per Airport", value=1000, step=100)
+    
+    df = rollup_cube(cube, ['ORIGIN'], years=years, months=months, carriers=carriers or None)
+    df = df[df['total_flights'] > min_flights]
+else:
+    df = get_dataset('airport_efficiency')
 
 if not df.empty:
     # Top Level Metrics
@@ -108,6 +114,16 @@ if not df.empty:
             title="Performance Profile (Normalized)"
         )
         st.plotly_chart(fig_radar, use_container_width=True)
+        
+        if not cube.empty:
+            st.subheader("Monthly Delay Trend")
+            trend = rollup_cube(cube, ['ORIGIN', 'YEAR', 'MONTH'], years=years, months=months,
+                                carriers=carriers or None, origins=selected_airports)
+            trend['period'] = pd.to_datetime(dict(year=trend['YEAR'], month=trend['MONTH'], day=1))
+            fig_trend = px.line(trend.sort_values('period'), x='period', y='avg_dep_delay', color='ORIGIN',
+                                markers=True, template="plotly_dark", title="Average Departure Delay by Month")
+            fig_trend.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig_trend, use_container_width=True)
     
     st.markdown("---")
     
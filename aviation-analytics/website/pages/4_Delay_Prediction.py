@@ -1,7 +1,6 @@
 
 import streamlit as st
 import pandas as pd
-import joblib
 from pathlib import Path
 import sys
 import os
@@ -9,6 +8,7 @@ import os
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from scoring import load_aei_model
 
 st.set_page_config(page_title="Delay Prediction", page_icon="⏱️", layout="wide")
 apply_theme()
@@ -18,13 +18,11 @@ render_header("Flight Delay Prediction", "fa-solid fa-clock")
 MODELS_DIR = Path("aviation-analytics/models")
 
 @st.cache_resource
-def load_aei_model():
-    model_path = MODELS_DIR / "aei_model.pkl"
-    if model_path.exists():
-        return joblib.load(model_path)
-    return None
+def load_model():
+    # Compact NumPy export when available; the pickle needs scikit-learn to load
+    return load_aei_model(MODELS_DIR)
 
-model = load_aei_model()
+model = load_model()
 
 # Initialize Session State
 if 'delay_pred' not in st.session_state:
@@ -40,11 +38,17 @@ with col1:
         # Hardcoding cancel rate for now as per model training simplification
         avg_cancel = 0.015
         
+        # Models trained on the AEI cube also take the calendar month
+        uses_month = model is not None and 'month' in getattr(model, 'feature_names_in_', [])
+        month = st.slider("Month", 1, 12, 1) if uses_month else None
+        
         submitted = st.form_submit_button("Predict Delay")
         
         if submitted and model:
             input_data = pd.DataFrame([[vol, avg_cancel]], 
                                       columns=['total_flights', 'cancellation_rate'])
+            if uses_month:
+                input_data['month'] = month
             pred = model.predict(input_data)[0]
             
             # Sensitivity Analysis
@@ -54,6 +58,8 @@ with col1:
                 'total_flights': vol_range,
                 'cancellation_rate': avg_cancel
             })
+            if uses_month:
+                sensitivity_data['month'] = month
             sensitivity_preds = model.predict(sensitivity_data)
             
             st.session_state.delay_pred = {
@@ -1,15 +1,13 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-import numpy as np
 import os
 import sys
 
 # Add src to path
 sys.path.append(os.path.abspath("aviation-analytics/src"))
 from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from delay_causes import delay_cause_version, load_delay_summary
 
 # Page Config
 st.set_page_config(page_title="Airline Comparisons", page_icon="✈️", layout="wide")
@@ -21,51 +19,26 @@ render_header("Airline & Airport Comparisons", "fa-solid fa-chart-bar")
 st.markdown("### Deep Dive into Delay Drivers and Performance")
 
 # Load Data
-@st.cache_data
-def load_data():
-    # Adjust path to where the CSV is located relative to this file
-    # Assuming website/pages/5_...py, and csv is in aviation-analytics/Airline_Delay_Cause.csv
-    # We need to go up two levels: pages -> website -> aviation-analytics
-    
-    # Try absolute path based on known structure or relative
-    possible_paths = [
-        "../../Airline_Delay_Cause.csv",
-        "Airline_Delay_Cause.csv",
-        "/mount/src/mgta-452-final-project/aviation-analytics/Airline_Delay_Cause.csv"
-    ]
-    
-    df = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            df = pd.read_csv(path)
-            break
-            
-    if df is None:
-        st.error("Could not find 'Airline_Delay_Cause.csv'. Please ensure the data file is present.")
-        return None
-
-    # Data Processing
-    # 1. Calculate Delay Rate
-    # Avoid division by zero
-    df = df[df["arr_flights"] > 0].copy()
-    df["delay_rate"] = df["arr_del15"] / df["arr_flights"]
-    
-    # 2. Create Timestamp
-    df["timestamp"] = pd.to_datetime(df["year"].astype(str) + "-" + df["month"].astype(str))
-    
-    return df
+@st.cache_resource
+def load_summary(version):
+    # Rollups and regression coefficients precomputed per data version (see process_all.py),
+    # so reruns do no aggregation over the delay-cause table
+    return load_delay_summary()
 
-df = load_data()
+summary = load_summary(delay_cause_version())
+if summary is None:
+    st.error("Could not find 'Airline_Delay_Cause.csv'. Please ensure the data file is present.")
 
-if df is not None:
+if summary is not None:
+    totals = summary["totals"]
     # --- Layout: Top Metrics ---
     col1, col2, col3 = st.columns(3)
     with col1:
-        render_metric_card("Total Flights Analyzed", f"{df['arr_flights'].sum():,.0f}")
+        render_metric_card("Total Flights Analyzed", f"{totals['arr_flights']:,.0f}")
     with col2:
-        render_metric_card("Avg Delay Rate (Global)", f"{df['delay_rate'].mean():.2%}")
+        render_metric_card("Avg Delay Rate (Global)", f"{totals['delay_rate']:.2%}")
     with col3:
-        render_metric_card("Total Delayed Flights", f"{df['arr_del15'].sum():,.0f}")
+        render_metric_card("Total Delayed Flights", f"{totals['arr_del15']:,.0f}")
 
     st.markdown("---")
 
@@ -76,7 +49,7 @@ if df is not None:
     
     with c1:
         st.markdown("**Average Delay Rate by Carrier**")
-        carrier_delay = df.groupby("carrier")["delay_rate"].mean().sort_values(ascending=True).reset_index()
+        carrier_delay = summary["carrier_delay"]
         fig_carrier = px.bar(
             carrier_delay, 
             x="delay_rate", 
@@ -94,9 +67,8 @@ if df is not None:
     with c2:
         st.markdown("**Top 20 Airports by Delay Rate**")
         # Filter for airports with significant traffic to avoid outliers from tiny airports
-        # Let's take top 50 airports by volume first, then sort by delay rate
-        top_airports_vol = df.groupby("airport")["arr_flights"].sum().nlargest(50).index
-        airport_delay = df[df["airport"].isin(top_airports_vol)].groupby("airport")["delay_rate"].mean().sort_values(ascending=True).tail(20).reset_index()
+        # Top 50 airports by volume first, then the 20 highest delay rates among them
+        airport_delay = summary["airport_delay"]
         
         fig_airport = px.bar(
             airport_delay,
@@ -121,17 +93,7 @@ if df is not None:
     
     with c3:
         st.markdown("**Average Delay Minutes by Cause**")
-        cause_cols = [
-            "carrier_delay",
-            "weather_delay",
-            "nas_delay",
-            "security_delay",
-            "late_aircraft_delay",
-        ]
-        # Calculate mean for each cause
-        cause_means = df[cause_cols].mean().reset_index()
-        cause_means.columns = ["Cause", "Average Minutes"]
-        cause_means = cause_means.sort_values(by="Average Minutes", ascending=True)
+        cause_means = summary["cause_means"]
         
         fig_cause = px.bar(
             cause_means,
@@ -148,7 +110,7 @@ if df is not None:
         
     with c4:
         st.markdown("**Monthly Delay Trend Over Time**")
-        monthly_trend = df.groupby("timestamp")["delay_rate"].mean().reset_index()
+        monthly_trend = summary["monthly_trend"]
         
         fig_trend = px.line(
             monthly_trend,
@@ -169,26 +131,10 @@ if df is not None:
     st.subheader("🧠 Factor Importance Analysis")
     st.info("This analysis uses a Linear Regression model to determine which delay factors have the strongest relative influence on the overall Delay Rate.")
 
-    # Prepare Data for Regression (Monthly Aggregation)
-    # We aggregate by month to reduce noise and match the notebook's approach
-    monthly_agg = df.groupby("timestamp")[cause_cols + ["delay_rate"]].mean().reset_index()
-    
-    X = monthly_agg[cause_cols]
-    y = monthly_agg["delay_rate"]
-    
-    # Fit Model
-    reg = LinearRegression()
-    reg.fit(X, y)
-    
-    # Extract Coefficients
-    coef_df = pd.DataFrame({"Factor": cause_cols, "Coefficient": reg.coef_})
-    coef_df["Abs_Coefficient"] = coef_df["Coefficient"].abs()
-    
-    # Normalize for Radar Chart (0 to 1 scale)
-    # This helps visualize relative importance
-    min_val = coef_df["Abs_Coefficient"].min()
-    max_val = coef_df["Abs_Coefficient"].max()
-    coef_df["Normalized Importance"] = (coef_df["Abs_Coefficient"] - min_val) / (max_val - min_val)
+    # Linear Regression of the monthly delay rate on monthly cause minutes (monthly aggregation
+    # reduces noise and matches the notebook's approach), fitted offline with the rollups above.
+    # Includes the 0-1 normalized importance used by the radar chart.
+    coef_df = summary["factor_importance"]
     
     # Radar Chart
     categories = coef_df["Factor"].tolist()
@@ -0,0 +1,123 @@
+
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+import sys
+import os
+import plotly.express as px
+
+# Add src to path
+sys.path.append(os.path.abspath("aviation-analytics/src"))
+from ui_utils import apply_theme, render_header, render_metric_card, render_sidebar
+from scoring import load_icing_model, predict_turbulence_batch
+from risk_grid import ICING_RISK_GRID_PATH, TurbulenceRiskGrid
+from data_service import get_dataset
+
+st.set_page_config(page_title="Icing Risk", page_icon="🧊", layout="wide")
+apply_theme()
+render_sidebar()
+render_header("Icing Risk Prediction", "fa-solid fa-snowflake")
+
+MODELS_DIR = Path("aviation-analytics/models")
+
+@st.cache_resource
+def load_model():
+    # Compact NumPy export when available; the pickles need scikit-learn to load
+    return load_icing_model(MODELS_DIR)
+
+model, le = load_model()
+
+@st.cache_resource
+def load_risk_grid():
+    # Memory-mapped, so the grid is shared across sessions and paged in on demand
+    if ICING_RISK_GRID_PATH.exists():
+        return TurbulenceRiskGrid(ICING_RISK_GRID_PATH)
+    return None
+
+risk_grid = load_risk_grid()
+
+color_map = {"Severe": "#ff4b4b", "Moderate": "#ffa421", "Light": "#58a6ff", "None": "#21c354"}
+
+# Initialize Session State
+if 'icing_pred' not in st.session_state:
+    st.session_state.icing_pred = None
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.markdown("### Flight Parameters")
+    with st.form("icing_form"):
+        c1, c2, c3 = st.columns(3)
+        alt = c1.number_input("Altitude (ft)", value=12000, step=1000)
+        lat = c2.number_input("Latitude", value=45.0)
+        lon = c3.number_input("Longitude", value=-93.0)
+        
+        c4, c5 = st.columns(2)
+        month = c4.slider("Month", 1, 12, 1)
+        hour = c5.slider("Hour (UTC)", 0, 23, 12)
+        
+        submitted = st.form_submit_button("Predict Icing", use_container_width=True)
+        
+        if submitted and model:
+            # The icing model shares the turbulence features and label scale
+            pred = predict_turbulence_batch(model, le, [[alt, lat, lon, month, hour]]).iloc[0]
+            
+            st.session_state.icing_pred = {
+                "label": pred["label"],
+                "risk_score": pred["risk_score"],
+                "proba": {c: pred[c] for c in le.classes_},
+                "inputs": {"alt": alt, "lat": lat, "lon": lon, "month": month, "hour": hour}
+            }
+
+with col2:
+    st.markdown("### Icing Assessment")
+    if st.session_state.icing_pred:
+        result = st.session_state.icing_pred["label"]
+        proba = st.session_state.icing_pred["proba"]
+        
+        c1, c2 = st.columns(2)
+        with c1: render_metric_card("Most Likely", result)
+        with c2: render_metric_card("Risk Score", f"{st.session_state.icing_pred['risk_score']:.2f}")
+        
+        proba_df = pd.DataFrame({'Intensity': list(proba), 'Probability': list(proba.values())})
+        fig_proba = px.bar(proba_df, x='Intensity', y='Probability', color='Intensity',
+                           color_discrete_map=color_map, template="plotly_dark",
+                           category_orders={'Intensity': ['None', 'Light', 'Moderate', 'Severe']})
+        fig_proba.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", showlegend=False)
+        st.plotly_chart(fig_proba, use_container_width=True)
+    elif not model:
+        st.warning("Icing model not found. Please train the models first.")
+    else:
+        st.info("Enter flight parameters and click Predict.")
+
+# Precomputed risk map for the last prediction
+if st.session_state.icing_pred and risk_grid is not None:
+    st.markdown("---")
+    inputs = st.session_state.icing_pred["inputs"]
+    st.subheader(f"Icing Risk Map at {inputs['alt']:,} ft")
+    map_df = risk_grid.risk_map(inputs['alt'], inputs['month'], inputs['hour'])
+    fig_risk = px.density_mapbox(
+        map_df,
+        lat='latitude',
+        lon='longitude',
+        z='risk_score',
+        radius=25,
+        center=dict(lat=inputs['lat'], lon=inputs['lon']),
+        zoom=3,
+        range_color=(0, 1),
+        mapbox_style="carto-darkmatter"
+    )
+    fig_risk.update_layout(margin={"r":0,"t":0,"l":0,"b":0}, paper_bgcolor="rgba(0,0,0,0)")
+    st.plotly_chart(fig_risk, use_container_width=True)
+
+# Observed icing reports
+df = get_dataset('icing')
+if not df.empty:
+    st.markdown("---")
+    st.subheader("Reported Icing by Altitude")
+    fig_alt = px.histogram(df.dropna(subset=['altitude']), x='altitude', color='icing_intensity', nbins=45,
+                           color_discrete_map=color_map, template="plotly_dark",
+                           category_orders={'icing_intensity': ['None', 'Light', 'Moderate', 'Severe']})
+    fig_alt.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                          xaxis_title="Altitude (ft)", yaxis_title="Reports")
+    st.plotly_chart(fig_alt, use_container_width=True)